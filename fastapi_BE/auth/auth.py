@@ -1,55 +1,156 @@
 from fastapi import Request, HTTPException
-from jose import jwt
+from jose import jwk, jwt
+from jose.backends.base import Key
 from jose.exceptions import JWTError
+import hashlib
 import requests
-from typing import Optional
+import threading
+import time
+from typing import Dict, Optional
 from core.config import settings
+from utils.cache import TTLCache
+from utils.metrics import register_stats
+from utils.tracing import span
 
 # Auth0/Okta configuration
 DOMAIN = settings.auth0_domain
 AUDIENCE = settings.auth0_audience
 ALGORITHMS = ["RS256"]
-ISSUER = f"https://{DOMAIN}/"
+ISSUER = settings.auth0_issuer or f"https://{DOMAIN}/"
+JWKS_URL = settings.auth0_jwks_url or f"https://{DOMAIN}/.well-known/jwks.json"
+
+
+class JWKSKeyStore:
+    """Process-wide cache of the Auth0 signing keys, parsed once and indexed by kid"""
+
+    def __init__(self, jwks_url: str, ttl: float, min_refresh_interval: float, timeout: float):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._keys: Dict[str, Key] = {}
+        self._fetched_at = 0.0
+        self._last_attempt = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._background_lock = threading.Lock()
+
+    def _fetch(self) -> Dict[str, Key]:
+        """Download the JWKS and build RSA key objects for every signing key"""
+        with span("jwks_fetch"):
+            response = requests.get(self.jwks_url, timeout=self.timeout)
+        response.raise_for_status()
+
+        keys = {}
+        for key in response.json().get("keys", []):
+            if key.get("kty") != "RSA" or not key.get("kid"):
+                continue
+            keys[key["kid"]] = jwk.construct(
+                {"kty": key["kty"], "kid": key["kid"], "n": key["n"], "e": key["e"]},
+                algorithm=ALGORITHMS[0]
+            )
+        return keys
+
+    def _refresh(self, generation: int) -> None:
+        """Refetch the key set, unless another caller already did so since `generation` was read"""
+        with self._lock:
+            if self._generation != generation:
+                return
+
+            self._last_attempt = time.monotonic()
+            try:
+                keys = self._fetch()
+            except Exception as e:
+                # Keep serving the last good key set while Auth0 is slow or down
+                print(f"Error refreshing JWKS from {self.jwks_url} -> {e}")
+                if not self._keys:
+                    raise
+                return
+
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            self._generation += 1
+
+    def _background_refresh(self, generation: int) -> None:
+        try:
+            self._refresh(generation)
+        except Exception:
+            pass
+        finally:
+            self._background_lock.release()
+
+    def _can_attempt_refresh(self) -> bool:
+        return time.monotonic() - self._last_attempt >= self.min_refresh_interval
+
+    def get_key(self, kid: str) -> Optional[Key]:
+        """Return the signing key for `kid`, refreshing the key set when it is stale or unknown"""
+        generation = self._generation
+        key = self._keys.get(kid)
+
+        if key is not None:
+            # Stale keys are still served while a single background thread refetches them
+            is_stale = time.monotonic() - self._fetched_at > self.ttl
+            if is_stale and self._can_attempt_refresh() and self._background_lock.acquire(blocking=False):
+                threading.Thread(target=self._background_refresh, args=(generation,), daemon=True).start()
+            return key
+
+        # Unknown kid, the keys may have been rotated. Concurrent callers share one refetch,
+        # and refetches are rate limited so random kids cannot hammer Auth0.
+        if self._keys and not self._can_attempt_refresh():
+            return None
+        self._refresh(generation)
+        return self._keys.get(kid)
+
+
+jwks_store = JWKSKeyStore(
+    jwks_url=JWKS_URL,
+    ttl=settings.auth0_jwks_ttl,
+    min_refresh_interval=settings.auth0_jwks_min_refresh_interval,
+    timeout=settings.auth0_jwks_timeout
+)
+
+# Verified payloads keyed by a digest of the raw token, each entry expires at the token's exp
+token_cache = TTLCache(maxsize=settings.auth_token_cache_size)
+register_stats("auth_token_cache", token_cache.stats)
+
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
-def get_token_jwks():
-    jwks_url = f"https://{DOMAIN}/.well-known/jwks.json"
-    return requests.get(jwks_url).json()
 
 def validate_token(request: Request) -> Optional[dict]:
     token = request.headers.get("Authorization")
     if not token or not token.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Invalid token format")
-    
+
     token = token.split("Bearer ")[1]
+    token_digest = _token_digest(token)
+    payload = token_cache.get(token_digest)
+    if payload is not None:
+        return payload
+
     try:
-        jwks = get_token_jwks()
         unverified_header = jwt.get_unverified_header(token)
-        rsa_key = {}
-        
-        for key in jwks["keys"]:
-            if key["kid"] == unverified_header["kid"]:
-                rsa_key = {
-                    "kty": key["kty"],
-                    "kid": key["kid"],
-                    "n": key["n"],
-                    "e": key["e"]
-                }
-                break
+        rsa_key = jwks_store.get_key(unverified_header.get("kid"))
 
         if not rsa_key:
             raise HTTPException(status_code=401, detail="Unable to find appropriate key")
 
-        payload = jwt.decode(
-            token,
-            rsa_key,
-            algorithms=ALGORITHMS,
-            audience=AUDIENCE,
-            issuer=ISSUER
-        )
+        with span("jwt_verify"):
+            payload = jwt.decode(
+                token,
+                rsa_key,
+                algorithms=ALGORITHMS,
+                audience=AUDIENCE,
+                issuer=ISSUER
+            )
+
+        # Tokens without an expiry are never cached, they would stay valid forever
+        if isinstance(payload.get("exp"), (int, float)):
+            token_cache.set(token_digest, payload, expires_at=payload["exp"])
         return payload
 
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
-
@@ -0,0 +1,100 @@
+"""Payload size and latency of vision extraction, raw upload vs preprocessed image.
+
+Run from fastapi_BE/:
+    python -m benchmarks.bench_image_preprocessing --images 5
+    python -m benchmarks.bench_image_preprocessing --images 3 --vision   # also times the vision model, needs .env
+"""
+import argparse
+import asyncio
+import base64
+import io
+import random
+import time
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from utils.image_preprocessing import prepare_vision_image
+
+VISION_PROMPT = "Extract all text from this resume image. Format it clearly and preserve the structure."
+
+
+def build_resume_photo(width: int = 4032, height: int = 3024, seed: int = 0) -> bytes:
+    """Phone-camera-like photo of a resume: colour, sensor noise, rotated via EXIF, saved at high quality"""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (236, 231, 220))
+    draw = ImageDraw.Draw(image)
+    for line in range(120):
+        y = 120 + line * (height - 240) // 120
+        words = " ".join(rng.choice(["Python", "FastAPI", "Led", "team", "AWS", "2019-2024", "Engineer", "delivered"]) for _ in range(14))
+        draw.text((160, y), words, fill=(30, 30, 40))
+    noise = Image.effect_noise((width, height), 18).convert("RGB")
+    image = Image.blend(image, noise, 0.12).filter(ImageFilter.GaussianBlur(0.6))
+
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees, as phones store portrait shots
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=95, exif=exif)
+    return output.getvalue()
+
+
+async def time_vision_call(model, content: bytes, mime_type: str) -> float:
+    from langchain_core.messages import HumanMessage
+
+    image_data = base64.b64encode(content).decode("utf-8")
+    message = HumanMessage(content=[
+        {"type": "text", "text": VISION_PROMPT},
+        {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{image_data}", "detail": "high"}},
+    ])
+    started = time.perf_counter()
+    await model.ainvoke([message])
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=5)
+    parser.add_argument("--max-side", type=int, default=1120)
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--vision", action="store_true", help="also time the vision model on both payloads")
+    args = parser.parse_args()
+
+    model = None
+    if args.vision:
+        from utils.llm import build_chat_model
+        model = build_chat_model("Llama-3.2-90B-Vision-Instruct", max_tokens=1000)
+
+    totals = {"raw": 0, "prepared": 0, "preprocess": 0.0, "vision_raw": 0.0, "vision_prepared": 0.0}
+    for seed in range(args.images):
+        raw = build_resume_photo(seed=seed)
+        prepared = prepare_vision_image(raw, args.max_side, args.quality)
+        totals["raw"] += len(raw)
+        totals["prepared"] += len(prepared.content)
+        totals["preprocess"] += prepared.elapsed
+        line = (
+            f"image {seed}: {len(raw) / 1024:.0f} KiB {prepared.original_dimensions} -> "
+            f"{len(prepared.content) / 1024:.0f} KiB {prepared.dimensions} in {prepared.elapsed * 1000:.0f}ms"
+        )
+        if model is not None:
+            vision_raw = asyncio.run(time_vision_call(model, raw, "image/jpeg"))
+            vision_prepared = asyncio.run(time_vision_call(model, prepared.content, prepared.mime_type))
+            totals["vision_raw"] += vision_raw
+            totals["vision_prepared"] += vision_prepared
+            line += (
+                f", vision {vision_raw:.2f}s -> {vision_prepared:.2f}s, "
+                f"saved {vision_raw - vision_prepared - prepared.elapsed:.2f}s net of preprocessing"
+            )
+        print(line)
+
+    count = args.images
+    print(
+        f"average: {totals['raw'] / count / 1024:.0f} KiB -> {totals['prepared'] / count / 1024:.0f} KiB "
+        f"({100 * (1 - totals['prepared'] / totals['raw']):.0f}% smaller), "
+        f"preprocess {totals['preprocess'] / count * 1000:.0f}ms per image"
+    )
+    if model is not None:
+        saved = (totals["vision_raw"] - totals["vision_prepared"]) / count
+        print(f"vision time saved per image: {saved:.2f}s (after {totals['preprocess'] / count * 1000:.0f}ms preprocessing)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Job search latency, agent loop vs fan-out pipeline, against the local stand-ins.
+
+The agent stand-in makes --agent-searches tool calls, one model turn each, before it answers;
+the pipeline runs its queries at once and makes one extraction call. Reports latency, model and
+search requests per search, and matches returned.
+
+Run from fastapi_BE/:
+    python -m benchmarks.bench_job_search --runs 20 --concurrency 4 --llm-latency 1.0 --agent-searches 3
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.bench_routes import percentile, serve_standins, wait_until_up
+
+FILTERS = {
+    "job_title": "Backend Engineer",
+    "required_experience": "3+ years",
+    "technologies": ["Python", "FastAPI", "PostgreSQL"],
+    "work_type": "remote",
+    "location": "Berlin",
+}
+
+
+async def run_mode(processor, mode: str, runs: int, concurrency: int, calls_url: str) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    matches: List[int] = []
+
+    async def one(i: int) -> None:
+        # A distinct title per run keeps the searches independent
+        filters = {**FILTERS, "job_title": f"{FILTERS['job_title']} {i}"}
+        async with semaphore:
+            started = time.perf_counter()
+            response = await processor.search(filters, mode)
+            latencies.append(time.perf_counter() - started)
+            matches.append(len(response.matches))
+
+    async with httpx.AsyncClient() as client:
+        before = (await client.get(calls_url)).json()
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(runs)))
+        elapsed = time.perf_counter() - started
+        after = (await client.get(calls_url)).json()
+
+    return {
+        "mode": mode,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "mean_s": statistics.mean(latencies),
+        "searches_per_s": runs / elapsed,
+        "llm_calls": (after["llm"] - before["llm"]) / runs,
+        "search_calls": (after["tavily"] - before["tavily"]) / runs,
+        "matches": statistics.mean(matches),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Seconds before the model stand-in answers")
+    parser.add_argument("--tavily-latency", type=float, default=0.5)
+    parser.add_argument("--agent-searches", type=int, default=3, help="Tool calls the agent stand-in makes before answering")
+    parser.add_argument("--job-matches", type=int, default=10)
+    parser.add_argument("--standin-port", type=int, default=7111)
+    args = parser.parse_args()
+
+    standin_url = f"http://127.0.0.1:{args.standin_port}"
+    os.environ.update({
+        "SAMBANOVA_API_KEY": "bench",
+        "SAMBANOVA_BASE_URL": f"{standin_url}/v1",
+        "TAVILY_API_KEY": "bench",
+        "TAVILY_API_URL": f"{standin_url}/tavily",
+        "AUTH0_DOMAIN": "bench.invalid",
+        "AUTH0_AUDIENCE": "bench-api",
+        "DATABASE_URL": "sqlite://",
+    })
+
+    from benchmarks.standins import LocalIssuer, StandinConfig
+    from utils.filters_jobs import JobSearchProcessor
+    from utils.registry import build_search_tool
+
+    config = StandinConfig(
+        llm_latency=args.llm_latency,
+        tavily_latency=args.tavily_latency,
+        job_matches=args.job_matches,
+        agent_searches=args.agent_searches,
+    )
+    issuer = LocalIssuer(f"{standin_url}/auth/", "bench-api")
+    standins = multiprocessing.get_context("spawn").Process(
+        target=serve_standins, args=(config, issuer, args.standin_port), daemon=True
+    )
+    standins.start()
+    try:
+        wait_until_up(f"{standin_url}/calls")
+        processor = JobSearchProcessor(search_tool=build_search_tool())
+        for mode in ("agent", "pipeline"):
+            result = asyncio.run(run_mode(processor, mode, args.runs, args.concurrency, f"{standin_url}/calls"))
+            print(
+                f"{result['mode']:>8}: p50 {result['p50_s']:.2f}s, p95 {result['p95_s']:.2f}s, mean {result['mean_s']:.2f}s, "
+                f"{result['searches_per_s']:.2f} searches/s, {result['llm_calls']:.1f} model calls, "
+                f"{result['search_calls']:.1f} search calls, {result['matches']:.1f} matches per search"
+            )
+    finally:
+        standins.terminate()
+
+
+if __name__ == "__main__":
+    main()
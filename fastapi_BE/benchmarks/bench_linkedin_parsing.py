@@ -0,0 +1,113 @@
+"""Job posting HTML parsing: parser backends on the LinkedIn fixtures, then event-loop lag by where parsing runs.
+
+Throughput is single-threaded postings per second. Accuracy is the share of fields equal to the
+fixture's values, compared with whitespace removed since the description is split into paragraphs.
+Every third posting lacks its applicant count and apply link, which the parsers must return as "".
+
+Run from fastapi_BE/:
+    python -m benchmarks.bench_linkedin_parsing --postings 200 --workers 4
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.bench_pdf_extraction import probe_loop_lag
+from benchmarks.linkedin_fixtures import fixture_job, job_posting_html
+from utils.linkedin_parsing import JOB_POSTING_FIELDS, PARSERS, parse_job_posting
+
+
+def build_postings(count: int) -> List[Tuple[str, Dict[str, str]]]:
+    """(html, expected fields) pairs"""
+    postings = []
+    for i in range(count):
+        job_id = str(4000000000 + i)
+        html, expected = job_posting_html(job_id), dict(fixture_job(job_id))
+        if i % 3 == 2:
+            html = html.replace(f'<span class="num-applicants__caption topcard__flavor--metadata topcard__flavor--bullet">{expected["num_applicants"]}</span>', "")
+            html = html.replace('class="topcard__link"', 'class="topcard__title-link"')
+            expected.update(num_applicants="", apply_link="")
+        postings.append((html, expected))
+    return postings
+
+
+def _squash(value: str) -> str:
+    return "".join(value.split())
+
+
+def measure_backend(backend: str, postings: List[Tuple[str, Dict[str, str]]]) -> Dict:
+    parse = PARSERS[backend]
+    started = time.perf_counter()
+    parsed = [parse(html) for html, _ in postings]
+    elapsed = time.perf_counter() - started
+
+    correct = 0
+    for job, (_, expected) in zip(parsed, postings):
+        job = job or {}
+        correct += sum(_squash(job.get(field, "")) == _squash(expected[field]) for field in JOB_POSTING_FIELDS)
+    return {
+        "backend": backend,
+        "postings_per_s": len(postings) / elapsed,
+        "ms_per_posting": elapsed / len(postings) * 1000,
+        "accuracy": correct / (len(postings) * len(JOB_POSTING_FIELDS)),
+    }
+
+
+async def measure_placement(backend: str, htmls: List[str], executor: Optional[Executor]) -> Dict:
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(stop))
+    await asyncio.sleep(0.05)
+
+    loop = asyncio.get_running_loop()
+
+    async def parse(html: str):
+        if executor is None:
+            return parse_job_posting(html, backend)
+        return await loop.run_in_executor(executor, parse_job_posting, html, backend)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[parse(html) for html in htmls])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    lags = sorted(await probe)
+    return {
+        "wall_s": elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--postings", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4, help="thread and process pool size")
+    args = parser.parse_args()
+
+    postings = build_postings(args.postings)
+    print(f"{args.postings} postings, {statistics.mean(len(html) for html, _ in postings) / 1024:.1f} KiB each")
+    for backend in PARSERS:
+        result = measure_backend(backend, postings)
+        print(
+            f"{result['backend']:>11}: {result['postings_per_s']:.0f} postings/s, "
+            f"{result['ms_per_posting']:.2f} ms/posting, field accuracy {result['accuracy']:.1%}"
+        )
+
+    htmls = [html for html, _ in postings]
+    with ThreadPoolExecutor(max_workers=args.workers) as threads, ProcessPoolExecutor(max_workers=args.workers) as processes:
+        # Warm both pools so worker start-up is not counted
+        list(processes.map(parse_job_posting, htmls[:args.workers]))
+        list(threads.map(parse_job_posting, htmls[:args.workers]))
+        for backend in PARSERS:
+            for placement, executor in (("inline", None), ("threads", threads), ("processes", processes)):
+                result = asyncio.run(measure_placement(backend, htmls, executor))
+                print(
+                    f"{backend:>11} {placement:>9}: wall {result['wall_s']:.2f}s, loop lag "
+                    f"p50 {result['lag_p50_ms']:.1f}ms, max {result['lag_max_ms']:.1f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Event-loop latency while PDFs are being extracted, inline (old behaviour) vs process pool.
+
+Run from fastapi_BE/:
+    python -m benchmarks.bench_pdf_extraction --uploads 16 --pages 40
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.pdf_fixtures import build_resume_pdf
+from utils.pdf_extraction import extract_pdf_text
+
+
+def extract_inline(pdf_content: bytes) -> str:
+    # Mirrors the previous implementation: synchronous parsing and repeated string concatenation
+    import PyPDF2
+    from io import BytesIO
+
+    text_content = ""
+    for page in PyPDF2.PdfReader(BytesIO(pdf_content)).pages:
+        text_content += page.extract_text()
+    return text_content
+
+
+async def probe_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> list:
+    """Measure how late a 10ms timer fires, i.e. how long other requests would wait"""
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+    return lags
+
+
+async def run(mode: str, pdf: bytes, uploads: int, executor) -> dict:
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(stop))
+    await asyncio.sleep(0.05)
+
+    async def inline_upload():
+        return extract_inline(pdf)
+
+    async def pooled_upload():
+        return await asyncio.get_running_loop().run_in_executor(executor, extract_pdf_text, pdf)
+
+    upload = inline_upload if mode == "inline" else pooled_upload
+    started = time.perf_counter()
+    await asyncio.gather(*[upload() for _ in range(uploads)])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    lags = sorted(await probe)
+    return {
+        "mode": mode,
+        "wall_s": elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_p99_ms": lags[int(len(lags) * 0.99) - 1] * 1000 if len(lags) > 1 else lags[-1] * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=16, help="concurrent uploads")
+    parser.add_argument("--pages", type=int, default=40, help="pages per PDF")
+    parser.add_argument("--workers", type=int, default=2, help="process pool size")
+    args = parser.parse_args()
+
+    pdf = build_resume_pdf(args.pages)
+    print(f"{args.uploads} concurrent uploads of a {len(pdf) / 1024:.0f} KiB, {args.pages} page PDF")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        # Warm the pool so worker start-up is not counted
+        executor.submit(extract_pdf_text, pdf).result()
+        for mode in ("inline", "pool"):
+            result = asyncio.run(run(mode, pdf, args.uploads, executor))
+            print(
+                f"{result['mode']:>6}: wall {result['wall_s']:.2f}s, loop lag "
+                f"p50 {result['lag_p50_ms']:.1f}ms, p99 {result['lag_p99_ms']:.1f}ms, max {result['lag_max_ms']:.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
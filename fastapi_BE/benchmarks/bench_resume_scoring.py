@@ -0,0 +1,79 @@
+"""Latency and prompt tokens of resume scoring, single structured call vs domain -> score -> advice.
+
+Needs a model endpoint: the .env settings, or SAMBANOVA_BASE_URL pointing at a local stand-in.
+Run from fastapi_BE/:
+    python -m benchmarks.bench_resume_scoring --runs 5 --resume path/to/resume.pdf
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.pdf_fixtures import build_resume_pdf
+from utils.pdf_extraction import extract_pdf_text
+from utils.resume_jobs import ResumeProcessor
+from utils.resume_score import ResumeScorer
+
+
+def count_usage(scorer: ResumeScorer, usage: dict) -> None:
+    """Wrap the scorer's model so every call adds its token usage to `usage`"""
+    ainvoke = scorer.model.ainvoke
+
+    async def counting_ainvoke(*args, **kwargs):
+        response = await ainvoke(*args, **kwargs)
+        metadata = getattr(response, "usage_metadata", None) or {}
+        usage["calls"] += 1
+        usage["input_tokens"] += metadata.get("input_tokens", 0)
+        usage["output_tokens"] += metadata.get("output_tokens", 0)
+        return response
+
+    object.__setattr__(scorer.model, "ainvoke", counting_ainvoke)
+
+
+async def run(scorer: ResumeScorer, resume_text: str, mode: str, runs: int) -> dict:
+    usage = {"calls": 0, "input_tokens": 0, "output_tokens": 0}
+    count_usage(scorer, usage)
+    latencies = []
+    modes = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await scorer.score(resume_text, mode)
+        latencies.append(time.perf_counter() - started)
+        modes.append(result["scoring_mode"])
+    return {
+        "mode": mode,
+        "p50_s": statistics.median(latencies),
+        "mean_s": statistics.mean(latencies),
+        "max_s": max(latencies),
+        "calls_per_run": usage["calls"] / runs,
+        "input_tokens_per_run": usage["input_tokens"] / runs,
+        "output_tokens_per_run": usage["output_tokens"] / runs,
+        "fallbacks": sum(1 for used in modes if used != mode),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--resume", help="PDF resume to score, defaults to a synthetic two page resume")
+    args = parser.parse_args()
+
+    if args.resume:
+        with open(args.resume, "rb") as f:
+            resume_text = extract_pdf_text(f.read())
+    else:
+        resume_text = extract_pdf_text(build_resume_pdf(2))
+
+    for mode in ("multi", "single"):
+        # A fresh scorer per mode so the usage counters do not mix
+        scorer = ResumeScorer(ResumeProcessor())
+        result = asyncio.run(run(scorer, resume_text, mode, args.runs))
+        print(
+            f"{result['mode']:>6}: p50 {result['p50_s']:.2f}s, mean {result['mean_s']:.2f}s, max {result['max_s']:.2f}s, "
+            f"{result['calls_per_run']:.1f} calls, {result['input_tokens_per_run']:.0f} prompt / "
+            f"{result['output_tokens_per_run']:.0f} completion tokens per run, {result['fallbacks']} fallbacks"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""End-to-end route latency and throughput against local stand-ins for every external service.
+
+Starts the stand-ins (benchmarks.standins) and the app under uvicorn with its settings pointed at
+them, then drives each route at the given concurrency levels and reports p50/p95/p99 and requests
+per second. Nothing leaves the machine, so the numbers are the backend's own overhead plus the
+configured stand-in latency. The database defaults to a throwaway sqlite file; pass
+--database-url to measure against a local Postgres. Before measuring it checks that corrupt
+image uploads are rejected with a 400, and stops if they are not.
+
+Run from fastapi_BE/:
+    python -m benchmarks.bench_routes --concurrency 1,8,32 --requests 64
+    python -m benchmarks.bench_routes --routes job_search,jobs_save --llm-latency 0.5 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIENCE = "bench-api"
+ROUTES = [
+    "resume_upload", "resume_score", "job_search", "job_search_pipeline", "cover_letter",
+    "jobs_save", "jobs_get", "jobs_list", "jobs_delete", "linkedin_fetch",
+]
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def serve_standins(config, issuer, port: int) -> None:
+    from aiohttp import web
+    from benchmarks.standins import build_standin_app
+
+    web.run_app(build_standin_app(config, issuer), host="127.0.0.1", port=port, print=None, access_log=None)
+
+
+def wait_until_up(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+class RouteDriver:
+    """Builds one request per route, with per-request inputs so caches and coalescing stay cold"""
+
+    def __init__(self, client: httpx.AsyncClient, tokens: List[str], pages: int, unique: bool):
+        from benchmarks.pdf_fixtures import build_resume_pdf
+
+        self.client = client
+        self.tokens = tokens
+        self.pages = pages
+        self.unique = unique
+        self.build_resume_pdf = build_resume_pdf
+        self.shared_pdf = build_resume_pdf(pages)
+        self.user_id: Optional[int] = None
+        self.job_ids: List[int] = []
+
+    def _headers(self, i: int) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[i % len(self.tokens)]}"}
+
+    def _pdf(self, i: int) -> bytes:
+        return self.build_resume_pdf(self.pages, marker=str(i)) if self.unique else self.shared_pdf
+
+    def _marker(self, i: int) -> str:
+        return f" {i}" if self.unique else ""
+
+    async def setup(self) -> None:
+        response = await self.client.post(
+            "/api/v1/user/register",
+            json={"name": "Bench User", "email": "bench@example.com", "image": ""},
+            headers=self._headers(0)
+        )
+        response.raise_for_status()
+        self.user_id = response.json()["user_data"]["id"]
+
+    async def check_corrupt_images(self) -> None:
+        """A non-image sent as an image has to come back as a 400 from every route that reads one, for
+        uploads kept in memory and for ones spooled to disk (over 1 MB)"""
+        routes = (
+            ("/api/v1/resume/upload", "file", {"file_type": "image"}),
+            ("/api/v1/resume/score", "file", {"file_type": "image"}),
+            ("/api/v1/cover_letter/create", "resume_file", {"resume_type": "image", "job_description": "Backend engineer"}),
+        )
+        for size in (1024, 2 * 1024 * 1024):
+            for path, field, data in routes:
+                response = await self.client.post(
+                    path, files={field: ("resume.png", b"\x01" * size, "image/png")}, data=data, headers=self._headers(0)
+                )
+                if response.status_code != 400:
+                    raise RuntimeError(f"Corrupt {size} byte image to {path} got {response.status_code}: {response.text[:200]}")
+        print("Corrupt image uploads rejected with 400")
+
+    async def resume_upload(self, i: int) -> httpx.Response:
+        return await self.client.post(
+            "/api/v1/resume/upload",
+            files={"file": ("resume.pdf", self._pdf(i), "application/pdf")},
+            data={"file_type": "pdf"},
+            headers=self._headers(i)
+        )
+
+    async def resume_score(self, i: int) -> httpx.Response:
+        return await self.client.post(
+            "/api/v1/resume/score",
+            files={"file": ("resume.pdf", self._pdf(i), "application/pdf")},
+            data={"file_type": "pdf"},
+            headers=self._headers(i)
+        )
+
+    async def job_search(self, i: int, mode: str = "agent") -> httpx.Response:
+        return await self.client.post(
+            "/api/v1/filters/job_search",
+            params={"mode": mode},
+            json={"job_title": f"Backend Engineer{self._marker(i)}", "technologies": ["Python", "FastAPI"], "work_type": "remote"},
+            headers=self._headers(i)
+        )
+
+    async def job_search_pipeline(self, i: int) -> httpx.Response:
+        return await self.job_search(i, mode="pipeline")
+
+    async def cover_letter(self, i: int) -> httpx.Response:
+        return await self.client.post(
+            "/api/v1/cover_letter/create",
+            files={"resume_file": ("resume.pdf", self._pdf(i), "application/pdf")},
+            data={"resume_type": "pdf", "job_description": f"Backend engineer{self._marker(i)}, Python and PostgreSQL, remote."},
+            headers=self._headers(i)
+        )
+
+    async def jobs_save(self, i: int) -> httpx.Response:
+        response = await self.client.post(
+            f"/api/v1/jobs/save/{self.user_id}",
+            json={
+                "job_title": f"Backend Engineer {i}", "required_experience": "3+ years",
+                "technologies": ["Python"], "work_type": "remote", "location": "Remote", "company": "Acme",
+                "required_qualifications": ["BSc"], "application_link": "https://jobs.example.com",
+                "job_description": "Build backend services.", "salary_range": "NA",
+            },
+            headers=self._headers(i)
+        )
+        if response.status_code == 200:
+            self.job_ids.append(response.json()["job"]["id"])
+        return response
+
+    async def jobs_get(self, i: int) -> httpx.Response:
+        return await self.client.get(f"/api/v1/jobs/get_by_id/{self.job_ids[i % len(self.job_ids)]}", headers=self._headers(i))
+
+    async def jobs_list(self, i: int) -> httpx.Response:
+        return await self.client.get(f"/api/v1/jobs/{self.user_id}", headers=self._headers(i))
+
+    async def jobs_delete(self, i: int) -> httpx.Response:
+        if not self.job_ids:
+            raise RuntimeError("No saved jobs left to delete, run jobs_save with at least as many requests")
+        return await self.client.delete(f"/api/v1/jobs/{self.job_ids.pop()}", headers=self._headers(i))
+
+
+async def linkedin_fetch(i: int) -> int:
+    """Not a route yet: LinkedIn search ids plus details through utils.linkedin_search, in this process"""
+    from utils.linkedin_search import search_linkedin_jobs
+
+    jobs = await search_linkedin_jobs(keywords=f"backend engineer {i}", location_name="Remote", limit=25)
+    return 200 if jobs and all(job.get("job_title") for job in jobs) else 500
+
+
+async def run_level(call: Callable, concurrency: int, total: int, offset: int = 0) -> Dict:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    # Indices keep counting across levels, so no two requests of a run share inputs
+    next_index = iter(range(offset, offset + total))
+
+    async def worker():
+        for i in next_index:
+            started = time.perf_counter()
+            try:
+                result = await call(i)
+                status = result if isinstance(result, int) else result.status_code
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            if status != 200 and status != 201:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000 if latencies else 0.0,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+    }
+
+
+async def drive(args, base_url: str, tokens: List[str]) -> Tuple[List[Dict], Dict]:
+    results = []
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        driver = RouteDriver(client, tokens, args.pages, unique=not args.repeat_inputs)
+        await driver.setup()
+        await driver.check_corrupt_images()
+        sequence = 0
+        for route in args.routes:
+            call = linkedin_fetch if route == "linkedin_fetch" else getattr(driver, route)
+            if args.warmup and route not in ("jobs_delete", "jobs_save"):
+                await run_level(call, 1, args.warmup, sequence)
+                sequence += args.warmup
+            for concurrency in args.concurrency:
+                level = await run_level(call, concurrency, args.requests, sequence)
+                sequence += args.requests
+                level["route"] = route
+                results.append(level)
+                errors = ", ".join(f"{status}: {count}" for status, count in level["errors"].items()) or "-"
+                print(
+                    f"{route:<20} c={concurrency:<4} n={level['requests']:<5} "
+                    f"p50 {level['p50_ms']:8.1f}ms  p95 {level['p95_ms']:8.1f}ms  p99 {level['p99_ms']:8.1f}ms  "
+                    f"{level['throughput_rps']:8.1f} req/s  errors {errors}"
+                )
+        metrics = (await client.get("/metrics", headers=driver._headers(0))).json()
+    if "linkedin_fetch" in args.routes:
+        from utils.linkedin_http import linkedin_client
+
+        await linkedin_client.aclose()
+    return results, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", default=",".join(route for route in ROUTES if route != "linkedin_fetch"),
+                        help=f"Comma separated, in order. Available: {', '.join(ROUTES)}")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per route and concurrency level")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=2, help="Pages in the generated resume PDFs")
+    parser.add_argument("--repeat-inputs", action="store_true", help="Send identical inputs, to measure the caches")
+    parser.add_argument("--users", type=int, default=16, help="Distinct bearer tokens to rotate through")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds before the model stand-in answers")
+    parser.add_argument("--llm-token-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument("--tavily-latency", type=float, default=0.05)
+    parser.add_argument("--linkedin-latency", type=float, default=0.02)
+    parser.add_argument("--linkedin-429-every", type=int, default=0, help="Rate limit every Nth LinkedIn job posting request")
+    parser.add_argument("--job-matches", type=int, default=10)
+    parser.add_argument("--app-port", type=int, default=7100)
+    parser.add_argument("--standin-port", type=int, default=7101)
+    parser.add_argument("--database-url", help="Defaults to a throwaway sqlite file")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="Extra app settings, repeatable")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", help="Write the results and the app's /metrics here")
+    args = parser.parse_args()
+    args.routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+    unknown = set(args.routes) - set(ROUTES)
+    if unknown:
+        parser.error(f"Unknown routes: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="careersensei-bench-")
+    standin_url = f"http://127.0.0.1:{args.standin_port}"
+    app_env = {
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "SAMBANOVA_API_KEY": "bench",
+        "SAMBANOVA_BASE_URL": f"{standin_url}/v1",
+        "TAVILY_API_KEY": "bench",
+        "TAVILY_API_URL": f"{standin_url}/tavily",
+        "LINKEDIN_BASE_URL": f"{standin_url}/linkedin",
+        "AUTH0_DOMAIN": f"127.0.0.1:{args.standin_port}",
+        "AUTH0_AUDIENCE": AUDIENCE,
+        "AUTH0_JWKS_URL": f"{standin_url}/auth/.well-known/jwks.json",
+        "AUTH0_ISSUER": f"{standin_url}/auth/",
+        # Distinct inputs are meant to measure cold searches, the job store would answer them from earlier ones
+        "JOB_STORE_ENABLED": "true" if args.repeat_inputs else "false",
+    }
+    for item in args.app_env:
+        key, _, value = item.partition("=")
+        app_env[key] = value
+    # This process imports app modules too (stand-in canned replies, the linkedin scenario)
+    os.environ.update(app_env)
+
+    from benchmarks.standins import LocalIssuer, StandinConfig
+
+    issuer = LocalIssuer(app_env["AUTH0_ISSUER"], app_env["AUTH0_AUDIENCE"])
+    config = StandinConfig(
+        llm_latency=args.llm_latency,
+        llm_token_delay=args.llm_token_delay,
+        tavily_latency=args.tavily_latency,
+        linkedin_latency=args.linkedin_latency,
+        linkedin_rate_limit_every=args.linkedin_429_every,
+        job_matches=args.job_matches,
+    )
+    # Stand-ins get their own process so they do not share an event loop with the load generator
+    standins = multiprocessing.get_context("spawn").Process(
+        target=serve_standins, args=(config, issuer, args.standin_port), daemon=True
+    )
+    standins.start()
+
+    app_log_path = os.path.join(workdir, "app.log")
+    app_log = open(app_log_path, "wb")
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.app_port),
+         "--no-access-log", "--log-level", "warning"],
+        cwd=APP_DIR,
+        env={**os.environ, **app_env},
+        stdout=app_log,
+        stderr=subprocess.STDOUT
+    )
+    try:
+        wait_until_up(f"{standin_url}/auth/.well-known/jwks.json")
+        wait_until_up(f"http://127.0.0.1:{args.app_port}/")
+        tokens = [issuer.token(f"bench-user-{i}") for i in range(args.users)]
+        print(f"App log: {app_log_path}")
+        results, metrics = asyncio.run(drive(args, f"http://127.0.0.1:{args.app_port}", tokens))
+    finally:
+        app.terminate()
+        try:
+            app.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            app.kill()
+        standins.terminate()
+        app_log.close()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "results": results, "metrics": metrics}, f, indent=2, default=str)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
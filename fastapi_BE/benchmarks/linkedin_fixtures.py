@@ -0,0 +1,87 @@
+"""HTML shaped like LinkedIn's guest jobs API, with the markup utils.linkedin_search parses."""
+from html import escape
+from typing import Dict, List
+
+TITLES = ["Backend Engineer", "Senior Python Developer", "Data Engineer", "Platform Engineer", "ML Engineer"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli"]
+LOCATIONS = ["Remote", "Berlin, Germany", "Bengaluru, India", "New York, NY", "London, UK"]
+
+
+def fixture_job(job_id: str) -> Dict[str, str]:
+    """Deterministic job fields for `job_id`, the values the parser is expected to return"""
+    index = int(job_id) % len(TITLES)
+    return {
+        "job_title": f"{TITLES[index]} {job_id}",
+        "job_location": LOCATIONS[index],
+        "company_name": COMPANIES[index],
+        "time_posted": f"{index + 1} days ago",
+        "num_applicants": f"{(index + 1) * 25} applicants",
+        "job_desc_text": (
+            f"We are hiring a {TITLES[index]} with 3+ years of experience in Python, FastAPI, PostgreSQL and AWS. "
+            "Bachelor's degree in Computer Science or equivalent. " * 8
+        ).strip(),
+        "apply_link": f"https://www.linkedin.com/jobs/view/{job_id}",
+    }
+
+
+def search_page_html(job_ids: List[str]) -> str:
+    """One page of seeMoreJobPostings results, an empty body once the results run out"""
+    cards = []
+    for job_id in job_ids:
+        job = fixture_job(job_id)
+        cards.append(f"""<li>
+  <div class="base-card relative w-full hover:no-underline focus:no-underline base-card--link base-search-card base-search-card--link job-search-card" data-entity-urn="urn:li:jobPosting:{job_id}" data-reference-id="ref{job_id}" data-tracking-id="trk{job_id}">
+    <a class="base-card__full-link absolute top-0 right-0 bottom-0 left-0 p-0 z-[2]" href="https://www.linkedin.com/jobs/view/{job_id}">
+      <span class="sr-only">{escape(job["job_title"])}</span>
+    </a>
+    <div class="base-search-card__info">
+      <h3 class="base-search-card__title">{escape(job["job_title"])}</h3>
+      <h4 class="base-search-card__subtitle">{escape(job["company_name"])}</h4>
+      <div class="base-search-card__metadata">
+        <span class="job-search-card__location">{escape(job["job_location"])}</span>
+        <time class="job-search-card__listdate">{escape(job["time_posted"])}</time>
+      </div>
+    </div>
+  </div>
+</li>""")
+    return "\n".join(cards)
+
+
+def job_posting_html(job_id: str) -> str:
+    """A jobPosting/{id} page"""
+    job = fixture_job(job_id)
+    paragraphs = "".join(f"<p>{escape(sentence.rstrip('.'))}.</p>" for sentence in job["job_desc_text"].split(". ") if sentence)
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>{escape(job["job_title"])}</title></head>
+<body>
+  <section class="top-card-layout container-lined overflow-hidden babybear:rounded-[0px]">
+    <div class="top-card-layout__entity-info-container flex flex-wrap papabear:flex-nowrap">
+      <div class="top-card-layout__entity-info flex-grow flex-shrink-0 basis-0 babybear:flex-none babybear:w-full babybear:flex-none babybear:w-full">
+        <a href="{escape(job["apply_link"])}" class="topcard__link">
+          <h2 class="top-card-layout__title font-sans text-lg papabear:text-xl font-bold leading-open text-color-text mb-0 topcard__title">{escape(job["job_title"])}</h2>
+        </a>
+        <h4 class="top-card-layout__second-subline font-sans text-sm leading-open text-color-text-low-emphasis mt-0.5">
+          <div class="topcard__flavor-row">
+            <span class="topcard__flavor">
+              <a href="https://www.linkedin.com/company/{escape(job["company_name"].lower())}" class="topcard__org-name-link topcard__flavor--black-link">{escape(job["company_name"])}</a>
+            </span>
+            <span class="topcard__flavor topcard__flavor--bullet">{escape(job["job_location"])}</span>
+          </div>
+          <div class="topcard__flavor-row">
+            <span class="posted-time-ago__text topcard__flavor--metadata">{escape(job["time_posted"])}</span>
+            <span class="num-applicants__caption topcard__flavor--metadata topcard__flavor--bullet">{escape(job["num_applicants"])}</span>
+          </div>
+        </h4>
+      </div>
+    </div>
+  </section>
+  <section class="core-section-container my-3 description">
+    <div class="decorated-job-posting__details">
+      <section class="show-more-less-html">
+        <div class="show-more-less-html__markup">{paragraphs}</div>
+      </section>
+    </div>
+  </section>
+</body>
+</html>"""
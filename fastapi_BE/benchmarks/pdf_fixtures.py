@@ -0,0 +1,43 @@
+from typing import List
+
+
+def build_resume_pdf(pages: int, lines_per_page: int = 45, marker: str = "") -> bytes:
+    """Build a text-only multi-page PDF, large enough to make PyPDF2 work for a while.
+
+    `marker` is written on the first line, so every request can send different bytes.
+    """
+    objects: List[str] = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(pages)), pages
+        ),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page in range(pages):
+        lines = f"(Candidate {marker}) ' " if marker and page == 0 else ""
+        lines += " ".join(
+            f"(Page {page} line {line}: Senior backend engineer, Python, FastAPI, PostgreSQL, AWS) '"
+            for line in range(lines_per_page)
+        )
+        stream = f"BT /F1 10 Tf 40 800 Td 14 TL {lines} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * page} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        pdf += f"{offset:010d} 00000 n \n".encode("latin-1")
+    pdf += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode("latin-1")
+    return bytes(pdf)
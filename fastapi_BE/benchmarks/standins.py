@@ -0,0 +1,230 @@
+"""Local stand-ins for every service the backend calls, served by one aiohttp app.
+
+    /v1/chat/completions                      OpenAI-compatible chat (SambaNova), streaming and function calls
+    /tavily/search                            Tavily search
+    /linkedin/jobs-guest/jobs/api/...         LinkedIn guest jobs API HTML fixtures
+    /auth/.well-known/jwks.json               JWKS of a local RS256 issuer
+    /calls                                    Model and search requests served so far
+
+Responses are canned by prompt shape so every pipeline parses them like real output. Latency is
+configurable; usage counts are returned so token accounting keeps working.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import rsa
+from aiohttp import web
+from jose import jwk, jwt
+
+from benchmarks.linkedin_fixtures import job_posting_html, search_page_html
+from utils.resume_score import SCORE_COMPONENTS
+
+KID = "bench-key"
+SEARCH_TOOL_NAME = "tavily_search_results_json"
+
+
+@dataclass
+class StandinConfig:
+    llm_latency: float = 0.05
+    llm_token_delay: float = 0.0
+    tavily_latency: float = 0.05
+    linkedin_latency: float = 0.02
+    job_matches: int = 10
+    agent_searches: int = 1
+    linkedin_pages: int = 5
+    linkedin_page_size: int = 10
+    # Every Nth job posting request is answered 429 with Retry-After, 0 never
+    linkedin_rate_limit_every: int = 0
+
+
+class LocalIssuer:
+    """RS256 key pair that signs bearer tokens the app verifies through the served JWKS"""
+
+    def __init__(self, issuer: str, audience: str):
+        self.issuer = issuer
+        self.audience = audience
+        _, private_key = rsa.newkeys(2048)
+        self.private_pem = private_key.save_pkcs1().decode("ascii")
+        public_jwk = jwk.construct(self.private_pem, algorithm="RS256").public_key().to_dict()
+        self.jwks = {"keys": [{**public_jwk, "kid": KID, "use": "sig", "alg": "RS256"}]}
+
+    def token(self, subject: str, ttl: int = 3600) -> str:
+        now = int(time.time())
+        claims = {"sub": subject, "iss": self.issuer, "aud": self.audience, "iat": now, "exp": now + ttl}
+        return jwt.encode(claims, self.private_pem, algorithm="RS256", headers={"kid": KID})
+
+
+def _job_match(index: int) -> Dict:
+    return {
+        "job_title": f"Backend Engineer {index}",
+        "required_experience": "3+ years",
+        "technologies": ["Python", "FastAPI", "PostgreSQL"],
+        "work_type": "remote",
+        "location": "Remote",
+        "company": f"Company {index}",
+        "required_qualifications": ["Bachelor's degree"],
+        "application_link": f"https://jobs.example.com/{index}",
+        "job_description": "Build and run backend services.",
+        "salary_range": "NA",
+    }
+
+
+def _message_text(message: Dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def canned_reply(body: Dict, config: StandinConfig) -> Dict:
+    """The assistant message a real model would plausibly return for this prompt"""
+    messages = body.get("messages", [])
+    if body.get("functions") or body.get("tools"):
+        # Agent runs: search agent_searches times, one model turn each, then answer with the job matches JSON
+        searches = sum(1 for message in messages if message.get("role") in ("function", "tool"))
+        if searches < config.agent_searches:
+            # Derived from the request, so distinct inputs miss the app's search cache like real queries would
+            request_text = " ".join(_message_text(message) for message in messages if message.get("role") == "user")
+            query = f"backend engineer jobs {searches + 1} {hashlib.sha256(request_text.encode('utf-8')).hexdigest()[:8]}"
+            return {"function_call": {"name": SEARCH_TOOL_NAME, "arguments": json.dumps({"query": query})}}
+        answer = {"matches": [_job_match(i) for i in range(config.job_matches)], "search_summary": "Matching openings found."}
+        return {"content": "Here are the matches:\n" + json.dumps(answer)}
+
+    text = " ".join(_message_text(message) for message in messages)
+    if "Return only the domain name" in text:
+        content = "Software Engineering"
+    elif '"component_scores"' in text:
+        content = json.dumps({
+            "domain": "Software Engineering",
+            "component_scores": {component: 15 for component in SCORE_COMPONENTS},
+            "improvement_advice": ["Quantify achievements", "Add a projects section", "Tighten the summary"],
+        })
+    elif "Score these components" in text:
+        content = json.dumps({component: 15 for component in SCORE_COMPONENTS})
+    elif "bullet-point list of recommendations" in text:
+        content = "- Quantify achievements\n- Add a projects section\n- Tighten the summary\n- List certifications"
+    elif "Extract the job openings" in text:
+        content = json.dumps({"matches": [_job_match(i) for i in range(config.job_matches)], "search_summary": "Matching openings found."})
+    elif "cover letter" in text:
+        content = "Dear Hiring Manager,\n\n" + "I am excited to apply for this role. " * 40 + "\n\nSincerely,\nCandidate"
+    elif "Condense the following part" in text:
+        content = "Senior backend engineer. Python, FastAPI, PostgreSQL, AWS. 6 years."
+    else:
+        content = (
+            "Professional summary: senior backend engineer.\nKey skills: Python, FastAPI, PostgreSQL, AWS.\n"
+            "Years of experience: 6.\nCurrent role: Senior Backend Engineer.\nIndustry focus: SaaS."
+        )
+    return {"content": content}
+
+
+def _usage(body: Dict, reply: Dict) -> Dict:
+    prompt_tokens = sum(len(_message_text(message)) for message in body.get("messages", [])) // 4
+    completion_tokens = len(reply.get("content") or json.dumps(reply.get("function_call", ""))) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+def _pieces(text: str, size: int = 16) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+async def chat_completions(request: web.Request) -> web.StreamResponse:
+    config: StandinConfig = request.app["config"]
+    request.app["calls"]["llm"] += 1
+    body = await request.json()
+    reply = canned_reply(body, config)
+    finish_reason = "function_call" if "function_call" in reply else "stop"
+    base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": body.get("model", "bench")}
+    await asyncio.sleep(config.llm_latency)
+
+    if not body.get("stream"):
+        return web.json_response({
+            **base,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": None, **reply}, "finish_reason": finish_reason}],
+            "usage": _usage(body, reply),
+        })
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+
+    async def send(delta: Dict, finish: Optional[str] = None, usage: Optional[Dict] = None):
+        chunk = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+        if usage is not None:
+            chunk["usage"] = usage
+        await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+    if "function_call" in reply:
+        call = reply["function_call"]
+        await send({"role": "assistant", "content": None, "function_call": {"name": call["name"], "arguments": ""}})
+        for piece in _pieces(call["arguments"]):
+            await send({"function_call": {"arguments": piece}})
+    else:
+        await send({"role": "assistant", "content": ""})
+        for piece in _pieces(reply["content"]):
+            if config.llm_token_delay:
+                await asyncio.sleep(config.llm_token_delay)
+            await send({"content": piece})
+    await send({}, finish=finish_reason, usage=_usage(body, reply))
+    await response.write(b"data: [DONE]\n\n")
+    await response.write_eof()
+    return response
+
+
+async def tavily_search(request: web.Request) -> web.Response:
+    config: StandinConfig = request.app["config"]
+    request.app["calls"]["tavily"] += 1
+    body = await request.json()
+    await asyncio.sleep(config.tavily_latency)
+    results = [
+        {
+            "title": f"Backend Engineer {i} at Company {i}",
+            "url": f"https://jobs.example.com/{i}",
+            "content": "Hiring a backend engineer with Python, FastAPI and PostgreSQL experience. Remote.",
+            "score": 0.9 - i * 0.05,
+            "raw_content": None,
+        }
+        for i in range(body.get("max_results", 5))
+    ]
+    return web.json_response({"query": body.get("query"), "results": results, "images": [], "answer": None, "response_time": config.tavily_latency})
+
+
+async def linkedin_search(request: web.Request) -> web.Response:
+    config: StandinConfig = request.app["config"]
+    start = int(request.query.get("start", 0))
+    await asyncio.sleep(config.linkedin_latency)
+    total = config.linkedin_pages * config.linkedin_page_size
+    job_ids = [str(4000000000 + i) for i in range(start, min(start + config.linkedin_page_size, total))]
+    return web.Response(text=search_page_html(job_ids), content_type="text/html")
+
+
+async def linkedin_job_posting(request: web.Request) -> web.Response:
+    config: StandinConfig = request.app["config"]
+    await asyncio.sleep(config.linkedin_latency)
+    request.app["calls"]["linkedin_postings"] += 1
+    if config.linkedin_rate_limit_every and request.app["calls"]["linkedin_postings"] % config.linkedin_rate_limit_every == 0:
+        return web.Response(status=429, headers={"Retry-After": "0"})
+    return web.Response(text=job_posting_html(request.match_info["job_id"]), content_type="text/html")
+
+
+def build_standin_app(config: StandinConfig, issuer: LocalIssuer) -> web.Application:
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app["config"] = config
+    app["calls"] = {"llm": 0, "tavily": 0, "linkedin_postings": 0}
+
+    async def calls(request: web.Request) -> web.Response:
+        return web.json_response(request.app["calls"])
+
+    async def jwks(request: web.Request) -> web.Response:
+        return web.json_response(issuer.jwks)
+
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/tavily/search", tavily_search)
+    app.router.add_get("/linkedin/jobs-guest/jobs/api/seeMoreJobPostings/search/", linkedin_search)
+    app.router.add_get("/linkedin/jobs-guest/jobs/api/jobPosting/{job_id}", linkedin_job_posting)
+    app.router.add_get("/auth/.well-known/jwks.json", jwks)
+    app.router.add_get("/calls", calls)
+    return app
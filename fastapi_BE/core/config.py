@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Literal, Optional, Union
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
 
@@ -15,9 +15,125 @@ class Settings(BaseSettings):
     port: int = 7000
 
     database_url: str
+    # Ignored for sqlite URLs, which are only meant for local runs and the offline benchmarks
+    database_sslmode: str = "require"
     sambanova_api_key: str
+    sambanova_base_url: str = "https://api.sambanova.ai/v1"
     auth0_domain: str
     auth0_audience: str
+    # Override the endpoints derived from auth0_domain, e.g. to point at a local issuer
+    auth0_jwks_url: Optional[str] = None
+    auth0_issuer: Optional[str] = None
+    tavily_api_url: Optional[str] = None
+    linkedin_base_url: str = "https://www.linkedin.com"
+
+    # LinkedIn guest jobs API: search result pages fetched at once, the most pages per search, request timeout
+    linkedin_search_concurrency: int = 3
+    linkedin_search_max_pages: int = 10
+    linkedin_timeout: float = 10.0
+    # Shared LinkedIn session: requests in flight, connections per host, retries on 429/5xx with exponential backoff
+    linkedin_max_concurrency: int = 8
+    linkedin_max_connections_per_host: int = 8
+    linkedin_connect_timeout: float = 5.0
+    linkedin_max_retries: int = 3
+    linkedin_backoff_base: float = 1.0
+    linkedin_backoff_max: float = 30.0
+    # Job posting HTML parser, and the threads it runs on off the event loop (0 uses the default executor)
+    linkedin_parser: Literal["lxml", "html.parser"] = "lxml"
+    linkedin_parser_workers: int = 2
+    # Logged-in linkedin_api clients (LINKEDIN_SEARCH=linkedin_api): one thread each, cookies reused for up to max_age seconds
+    linkedin_email: Optional[str] = None
+    linkedin_pass: Optional[str] = None
+    linkedin_api_workers: int = 4
+    linkedin_api_session_max_age: float = 12 * 60 * 60
+
+    # Auth0 JWKS key store
+    auth0_jwks_ttl: int = 600
+    auth0_jwks_min_refresh_interval: int = 30
+    auth0_jwks_timeout: float = 5.0
+    auth_token_cache_size: int = 4096
+
+    # Shared HTTP pool for the model clients
+    llm_max_connections: int = 50
+    llm_timeout: float = 120.0
+
+    # Extracted text cache, keyed by a hash of the uploaded file
+    text_cache_max_entries: int = 1024
+    text_cache_max_bytes: int = 64 * 1024 * 1024
+    text_cache_dir: Optional[str] = None
+    text_cache_disk_max_bytes: int = 512 * 1024 * 1024
+
+    # PDF parsing runs in a process pool, 0 workers falls back to a thread
+    pdf_workers: int = 2
+    pdf_extraction_timeout: float = 30.0
+
+    # Upload limits, per file and for a whole multipart request
+    max_upload_bytes: int = 10 * 1024 * 1024
+    max_request_bytes: int = 25 * 1024 * 1024
+
+    # Vision model input, Llama 3.2 Vision tiles images into at most 1120x1120
+    vision_max_side: int = 1120
+    vision_jpeg_quality: int = 85
+
+    # Resume analysis cache: "memory", "disk", "none" or "package.module:factory"
+    analysis_cache_backend: str = "memory"
+    analysis_cache_ttl: int = 24 * 60 * 60
+    analysis_cache_max_entries: int = 1024
+    analysis_cache_dir: Optional[str] = None
+
+    # "single" scores a resume in one structured call, "multi" uses domain -> score -> advice
+    resume_scoring_mode: Literal["single", "multi"] = "multi"
+
+    # Web search results keyed by normalized query: "memory", "disk", "none" or "package.module:factory".
+    # Postings change within a day, so entries are kept for hours rather than days.
+    search_cache_backend: str = "memory"
+    search_cache_ttl: int = 6 * 60 * 60
+    search_cache_max_entries: int = 2048
+    search_cache_dir: Optional[str] = None
+
+    # LLM response cache, only call sites listed in llm_cache_sites (comma separated) are cached
+    llm_cache_backend: str = "memory"
+    llm_cache_ttl: int = 6 * 60 * 60
+    llm_cache_max_entries: int = 2048
+    llm_cache_dir: Optional[str] = None
+    llm_cache_sites: str = "resume_score.detect_domain,resume_score.calculate_score,resume_score.generate_advice,resume_score.single_call"
+
+    # Process-wide LLM scheduler: concurrent calls, tokens per minute (0 disables the budget) and 429 backoff
+    llm_max_concurrency: int = 8
+    llm_tokens_per_minute: int = 0
+    llm_max_retries: int = 4
+    llm_backoff_base: float = 1.0
+    llm_backoff_max: float = 30.0
+    llm_default_completion_tokens: int = 1024
+
+    # Prompt compaction: documents over their token budget are summarized chunk by chunk, then truncated
+    resume_prompt_token_budget: int = 3000
+    job_description_prompt_token_budget: int = 1500
+    prompt_tokenizer_encoding: str = "cl100k_base"
+    prompt_dedupe_min_chars: int = 25
+    prompt_chunk_chars: int = 6000
+    prompt_max_reduce_rounds: int = 2
+    prompt_summary_model: str = "Meta-Llama-3.1-8B-Instruct"
+
+    # "agent" lets the model decide which searches to run, "pipeline" runs queries built from the
+    # filters concurrently and extracts the matches in one model call
+    job_search_mode: Literal["agent", "pipeline"] = "agent"
+    job_search_pipeline_max_queries: int = 4
+    job_search_pipeline_max_results: int = 20
+
+    # Filter searches are answered from the shared job postings table when it has at least
+    # job_store_min_results postings seen within job_store_max_age seconds, the search tops it up otherwise
+    job_store_enabled: bool = True
+    job_store_min_results: int = 10
+    job_store_max_results: int = 20
+    job_store_max_age: int = 3 * 24 * 60 * 60
+
+    # Wall-clock budget for one job search agent run, matches found so far are returned when it runs out
+    agent_deadline_seconds: float = 60.0
+
+    # Per-stage timings: Server-Timing response header and histograms at /metrics/prometheus
+    tracing_enabled: bool = True
+    server_timing_enabled: bool = True
 
     @classmethod
     @field_validator("database_url", "sambanova_api_key", "auth0_domain", "auth0_audience")
@@ -1,11 +1,19 @@
 from sqlmodel import create_engine, SQLModel, Session
 from core.config import settings
+from utils.tracing import instrument_engine
 
 
 
 #  Engine is one for whole application
 connection_string : str = str(settings.database_url).replace("postgresql", "postgresql+psycopg")
-engine = create_engine(connection_string, connect_args={"sslmode":"require"}, pool_recycle=3000, pool_size=10, echo=True)
+if connection_string.startswith("sqlite"):
+    # Sessions are opened from FastAPI's thread pool
+    connect_args = {"check_same_thread": False}
+else:
+    connect_args = {"sslmode": settings.database_sslmode}
+engine = create_engine(connection_string, connect_args=connect_args, pool_recycle=3000, pool_size=10, echo=True)
+if settings.tracing_enabled:
+    instrument_engine(engine)
 
 def create_table():
     SQLModel.metadata.create_all(engine)
@@ -1,6 +1,8 @@
+import asyncio
 from contextlib import asynccontextmanager
 import traceback
 from fastapi import Depends, FastAPI, APIRouter
+from fastapi.responses import PlainTextResponse
 from routers import jobs
 from routers import filters
 from routers import resume
@@ -8,9 +10,15 @@ from routers import user
 from routers import cover_letter
 import uvicorn
 
+from auth.auth import validate_token
 from db.db import create_table, get_session
 from fastapi.middleware.cors import CORSMiddleware
 from core.config import settings
+from utils.metrics import collect_stats, render_prometheus
+from utils.prompt_budget import load_tokenizer
+from utils.registry import ProcessorRegistry
+from utils.tracing import TracingMiddleware
+from utils.uploads import RequestSizeLimitMiddleware
 
 
 # Creating a context manager so that we can connect to db & create tables before starting the app
@@ -19,7 +27,11 @@ async def lifespan(app: FastAPI):
     print("Creating Tables")
     create_table()
     print("Tables Created")
+    # Tokenizer encoding is downloaded once here, rather than on the event loop during the first request
+    await asyncio.to_thread(load_tokenizer)
+    app.state.registry = ProcessorRegistry()
     yield
+    await app.state.registry.aclose()
 
 
 app = FastAPI(
@@ -29,6 +41,9 @@ app = FastAPI(
 )
 
 
+# Oversized uploads are rejected before their multipart body is parsed
+app.add_middleware(RequestSizeLimitMiddleware, max_bytes=settings.max_request_bytes)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -37,6 +52,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so the timings cover every other middleware too
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware, server_timing=settings.server_timing_enabled)
+
 router = APIRouter(
     prefix="/api/v1"
 )
@@ -53,6 +72,17 @@ async def root():
     return {"message": "Hello World"}
 
 
+# Cache sizes, session ages and request stats are internal, only authenticated callers may read them
+@app.get("/metrics", dependencies=[Depends(validate_token)])
+async def metrics():
+    return collect_stats()
+
+
+@app.get("/metrics/prometheus", response_class=PlainTextResponse, dependencies=[Depends(validate_token)])
+async def prometheus_metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -1,7 +1,8 @@
+from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
 from sqlmodel import Relationship, SQLModel, Field
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, DDL, JSON, event
 
 # Jobs Table/Schema
 class JobBase(SQLModel):
@@ -25,6 +26,33 @@ class Jobs(JobBase, table=True):
     user: Optional["Users"] = Relationship(back_populates="jobs")
 
 
+# Job Postings Table/Schema, every job seen by a search or saved by a user, shared across users
+class JobPostings(JobBase, table=True):
+    id: int = Field(default=None, primary_key=True)
+    # A Column object belongs to one table, JobBase's JSON columns are already the jobs table's
+    technologies: List[str] = Field(sa_column=Column(JSON))
+    required_qualifications: List[str] = Field(sa_column=Column(JSON))
+    # Normalized application link, or company + title when there is no usable link
+    dedupe_key: str = Field(unique=True, index=True)
+    search_work_type: str = Field(index=True)
+    search_location: str = Field(index=True)
+    # Title, company, technologies, qualifications, location and description for full-text search
+    search_text: str
+    source: str
+    first_seen_at: datetime = Field(default_factory=datetime.utcnow)
+    last_seen_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+# Postgres only: a generated tsvector over the title and search text, with a GIN index
+for statement in (
+    "ALTER TABLE jobpostings ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', job_title), 'A') || "
+    "setweight(to_tsvector('english', search_text), 'B')) STORED",
+    "CREATE INDEX ix_jobpostings_search_vector ON jobpostings USING GIN (search_vector)",
+):
+    event.listen(JobPostings.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+
 # Users Table/Schema
 class UserBase(SQLModel):
     name: str
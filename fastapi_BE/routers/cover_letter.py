@@ -1,11 +1,16 @@
+import json
 import traceback
+from contextlib import AsyncExitStack
 from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Literal, Optional
 from db.db import get_session
 from auth.auth import validate_token
 from models.models import CoverLetterCreate, CoverLetters
-from utils.cover_letter import process_cover_letter
+from utils.cover_letter import process_cover_letter, stream_cover_letter_events
+from utils.llm_scheduler import llm_priority
+from utils.registry import ProcessorRegistry, get_registry
+from utils.uploads import detach_upload, ingest_upload
 
 cover_letter_router = APIRouter(
     prefix="/cover_letter",
@@ -14,44 +19,55 @@ cover_letter_router = APIRouter(
     dependencies=[Depends(validate_token)]
 )
 
+def validate_job_description_inputs(
+    job_description: Optional[str],
+    job_description_file: Optional[UploadFile],
+    job_description_type: Optional[str]
+):
+    if job_description is None and job_description_file is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Either job description text or file must be provided"
+        )
+    
+    if job_description_file and not job_description_type:
+        raise HTTPException(
+            status_code=400,
+            detail="Job description type must be provided when uploading a file"
+        )
+
+
 @cover_letter_router.post("/create")
 async def create_cover_letter(
     resume_file: UploadFile = File(...),
     resume_type: Literal["pdf", "image"] = Form(...),
     job_description: Optional[str] = Form(None),
     job_description_file: Optional[UploadFile] = File(None),
-    job_description_type: Optional[Literal["text", "pdf", "image"]] = Form(None)
+    job_description_type: Optional[Literal["text", "pdf", "image"]] = Form(None),
+    registry: ProcessorRegistry = Depends(get_registry)
 ):
     try:
         # Validate inputs
-        if job_description is None and job_description_file is None:
-            raise HTTPException(
-                status_code=400,
-                detail="Either job description text or file must be provided"
-            )
-        
-        if job_description_file and not job_description_type:
-            raise HTTPException(
-                status_code=400,
-                detail="Job description type must be provided when uploading a file"
-            )
+        validate_job_description_inputs(job_description, job_description_file, job_description_type)
         
-        # Read resume file
-        resume_content = await resume_file.read()
-        
-        # Read job description file if provided
-        job_desc_content = None
-        if job_description_file:
-            job_desc_content = await job_description_file.read()
-        
-        # Process and generate cover letter
-        result = await process_cover_letter(
-            resume_content,
-            resume_type,
-            job_description,
-            job_desc_content,
-            job_description_type
-        )
+        async with AsyncExitStack() as stack:
+            # Hash and size-check the uploads without copying them into memory
+            resume = await stack.enter_async_context(ingest_upload(resume_file))
+            
+            job_desc_upload = None
+            if job_description_file:
+                job_desc_upload = await stack.enter_async_context(ingest_upload(job_description_file))
+            
+            # Process and generate cover letter, a user is waiting on it
+            with llm_priority("interactive"):
+                result = await process_cover_letter(
+                    resume,
+                    resume_type,
+                    job_description,
+                    job_desc_upload,
+                    job_description_type,
+                    registry.cover_letter_generator
+                )
         
         return JSONResponse(
             content={
@@ -67,6 +83,57 @@ async def create_cover_letter(
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@cover_letter_router.post("/create/stream")
+async def create_cover_letter_stream(
+    resume_file: UploadFile = File(...),
+    resume_type: Literal["pdf", "image"] = Form(...),
+    job_description: Optional[str] = Form(None),
+    job_description_file: Optional[UploadFile] = File(None),
+    job_description_type: Optional[Literal["text", "pdf", "image"]] = Form(None),
+    registry: ProcessorRegistry = Depends(get_registry)
+):
+    """Stream the cover letter as NDJSON events: extracted, token..., then done (or error)"""
+    try:
+        validate_job_description_inputs(job_description, job_description_file, job_description_type)
+        
+        # The form is closed once this handler returns, so the stream works on its own copies
+        async with ingest_upload(resume_file) as resume_upload:
+            resume = await detach_upload(resume_upload)
+        job_desc_upload = None
+        if job_description_file:
+            async with ingest_upload(job_description_file) as job_description_upload:
+                job_desc_upload = await detach_upload(job_description_upload)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        # Set inside the generator, the body runs after this handler has returned
+        try:
+            with llm_priority("interactive"):
+                async for event in stream_cover_letter_events(
+                    resume,
+                    resume_type,
+                    job_description,
+                    job_desc_upload,
+                    job_description_type,
+                    registry.cover_letter_generator
+                ):
+                    yield json.dumps(event) + "\n"
+        finally:
+            resume.close()
+            if job_desc_upload:
+                job_desc_upload.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
     
     
 @cover_letter_router.post('/save/{user_id}')
@@ -1,9 +1,15 @@
+import json
 import traceback
+from typing import Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from auth.auth import validate_token
+from core.config import settings
 from models.models import Filters
-from utils.filters_jobs import process_job_search
+from utils.filters_jobs import process_job_search, stream_job_search_events
+from utils.llm_scheduler import llm_priority
+from utils.registry import ProcessorRegistry, get_registry
+from utils.single_flight import canonical_key
 
 
 filter_router = APIRouter(
@@ -14,12 +20,22 @@ filter_router = APIRouter(
 )
 
 @filter_router.post("/job_search")
-async def job_search(filters: Filters):
+async def job_search(
+    filters: Filters,
+    mode: Optional[Literal["agent", "pipeline"]] = None,
+    registry: ProcessorRegistry = Depends(get_registry)
+):
     try:
         # Convert Filters model to dict
         filter_dict = filters.dict(exclude_none=True)
         # Process job search
-        results = await process_job_search(filter_dict)
+        with llm_priority("background"):
+            # Duplicate submissions of the same filters wait on the search already running
+            results = await registry.single_flight.run(
+                "filters.job_search",
+                canonical_key(filter_dict, mode or settings.job_search_mode),
+                lambda: process_job_search(filter_dict, registry.job_search_processor, mode)
+            )
         return JSONResponse(content={
                 "success": True,
                 "message": "Job search processed successfully",
@@ -27,4 +43,26 @@ async def job_search(filters: Filters):
             }, status_code=200)
     except Exception as e:
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@filter_router.post("/job_search/stream")
+async def job_search_stream(
+    filters: Filters,
+    mode: Optional[Literal["agent", "pipeline"]] = None,
+    registry: ProcessorRegistry = Depends(get_registry)
+):
+    """Stream job matches as NDJSON events: match... as the model writes them, then done (or error)"""
+    filter_dict = filters.dict(exclude_none=True)
+
+    async def events():
+        # Set inside the generator, the body runs after this handler has returned
+        with llm_priority("background"):
+            async for event in stream_job_search_events(filter_dict, registry.job_search_processor, mode):
+                yield json.dumps(event) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,9 +1,11 @@
+import asyncio
 import traceback
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from db.db import get_session
 from auth.auth import validate_token
 from models.models import JobCreate, Jobs
+from utils.registry import ProcessorRegistry, get_registry
 
 
 jobs_router = APIRouter(
@@ -14,12 +16,18 @@ jobs_router = APIRouter(
 )
 
 @jobs_router.post("/save/{user_id}")
-async def save_job(job: JobCreate, user_id: int, session=Depends(get_session)):
+async def save_job(job: JobCreate, user_id: int, session=Depends(get_session), registry: ProcessorRegistry = Depends(get_registry)):
     try:
         job = Jobs(**job.model_dump(), user_id=user_id)
         session.add(job)
         session.commit()
         session.refresh(job)
+        if registry.job_store is not None:
+            # Saved jobs are shared postings too, filter searches can return them to other users
+            try:
+                await asyncio.to_thread(registry.job_store.record, [job.model_dump()], "saved")
+            except Exception as e:
+                print(f"Error recording job posting -> {e}")
         return JSONResponse(content={"success": True, "message": "Job saved successfully", "job": job.model_dump()}, status_code=200)
     except Exception as e:
         traceback.print_exc()
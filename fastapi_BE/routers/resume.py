@@ -2,11 +2,16 @@ import os
 import traceback
 from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
 from fastapi.responses import JSONResponse
-from typing import Literal
+from typing import Literal, Optional
 
 from auth.auth import validate_token
+from core.config import settings
 from utils.resume_score import process_resume_score
 from utils.resume_jobs import process_resume
+from utils.llm_scheduler import llm_priority
+from utils.registry import ProcessorRegistry, get_registry
+from utils.single_flight import canonical_key
+from utils.uploads import IngestedUpload, ingest_upload
 
 resume_router = APIRouter(
     prefix="/resume",
@@ -16,10 +21,23 @@ resume_router = APIRouter(
 )
 
 
+async def extract_upload_text(resume: IngestedUpload, file_type: str, registry: ProcessorRegistry) -> str:
+    """Text of an upload, extracted once for identical uploads in flight (a double-click makes one
+    vision call, not two). The shared work reads the upload of the request that started it, which
+    waits for the extraction to finish before its upload is closed"""
+    return await registry.single_flight.run(
+        "resume.extract",
+        canonical_key(resume.digest, file_type),
+        lambda: registry.resume_processor.extract_text(resume.getbuffer(), file_type, digest=resume.digest),
+        borrows=True
+    )
+
+
 @resume_router.post("/upload")
 async def upload_resume(
     file: UploadFile = File(...),
-    file_type: Literal["pdf", "image"] = Form(...)
+    file_type: Literal["pdf", "image"] = Form(...),
+    registry: ProcessorRegistry = Depends(get_registry)
 ):
     try:
         # Validate file type
@@ -28,11 +46,19 @@ async def upload_resume(
         elif file_type == "image" and not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="Invalid file type. Expected image file.")
         
-        # Read file content
-        file_content = await file.read()
-        
-        # Process resume
-        result = await process_resume(file_content, file_type)
+        # Hash and size-check the upload without copying it into memory
+        async with ingest_upload(file) as resume:
+            digest = resume.digest
+            text_content = await extract_upload_text(resume, file_type, registry)
+
+        # Process resume, the job search agent is long-running so it yields to interactive calls
+        # and a duplicate upload of the same file waits on the run already in flight
+        with llm_priority("background"):
+            result = await registry.single_flight.run(
+                "resume.upload",
+                canonical_key(digest, file_type),
+                lambda: process_resume(text_content, registry.resume_processor)
+            )
         
         return JSONResponse(
             content={
@@ -53,7 +79,9 @@ async def upload_resume(
 @resume_router.post("/score")
 async def score_resume(
     file: UploadFile = File(...),
-    file_type: Literal["pdf", "image"] = Form(...)
+    file_type: Literal["pdf", "image"] = Form(...),
+    scoring_mode: Optional[Literal["single", "multi"]] = Form(None),
+    registry: ProcessorRegistry = Depends(get_registry)
 ):
     try:
         # Validate file type
@@ -62,11 +90,17 @@ async def score_resume(
         elif file_type == "image" and not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="Invalid file type. Expected image file.")
         
-        # Read file content
-        file_content = await file.read()
-        
-        # Process and score resume
-        result = await process_resume_score(file_content, file_type)
+        # Hash and size-check the upload without copying it into memory
+        async with ingest_upload(file) as resume:
+            digest = resume.digest
+            resume_text = await extract_upload_text(resume, file_type, registry)
+
+        # Score resume, sharing the run with identical requests in flight
+        result = await registry.single_flight.run(
+            "resume.score",
+            canonical_key(digest, file_type, scoring_mode or settings.resume_scoring_mode),
+            lambda: process_resume_score(resume_text, registry.resume_scorer, scoring_mode)
+        )
         
         return JSONResponse(
             content={
@@ -0,0 +1,143 @@
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.utils import AddableDict
+from utils.metrics import histogram
+
+# Absolute time.monotonic() deadline of the current request, None when unbounded
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("agent_deadline", default=None)
+
+agent_iterations = histogram(
+    "agent_iterations", "Agent loop iterations per run", labels=("outcome",),
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15)
+)
+deadline_margin_seconds = histogram(
+    "agent_deadline_margin_seconds", "Time left before the deadline when an agent run ended",
+    buckets=(0.0, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+)
+
+_stats = {"runs": 0, "partial": 0, "iterations_total": 0, "iterations_max": 0, "deadline_margin_min_seconds": None}
+
+
+@contextmanager
+def agent_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound agent runs inside the block to `seconds` from now, or to an earlier deadline already set"""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_seconds() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def agent_run_stats() -> Dict:
+    return dict(_stats)
+
+
+class _AgentRun:
+    __slots__ = ("iterations", "partial")
+
+    def __init__(self):
+        self.iterations = 0
+        self.partial = False
+
+
+_current_run: contextvars.ContextVar[Optional[_AgentRun]] = contextvars.ContextVar("agent_run", default=None)
+
+
+def _record(run: _AgentRun) -> None:
+    _stats["runs"] += 1
+    _stats["partial"] += run.partial
+    _stats["iterations_total"] += run.iterations
+    _stats["iterations_max"] = max(_stats["iterations_max"], run.iterations)
+    agent_iterations.observe(run.iterations, "partial" if run.partial else "complete")
+
+    remaining = remaining_seconds()
+    if remaining is not None:
+        current_min = _stats["deadline_margin_min_seconds"]
+        _stats["deadline_margin_min_seconds"] = remaining if current_min is None else min(current_min, remaining)
+        deadline_margin_seconds.observe(max(remaining, 0.0))
+
+
+class DeadlineAgentExecutor(AgentExecutor):
+    """AgentExecutor that checks the request deadline before and during every step.
+
+    When time runs out the run finishes with the answer `partial_output` builds from the steps
+    completed so far, and "partial" is True in the outputs.
+    """
+
+    partial_output: Optional[Callable[[List[Tuple[AgentAction, Any]]], str]] = None
+
+    def _partial_finish(self, intermediate_steps: List[Tuple[AgentAction, Any]]) -> AgentFinish:
+        run = _current_run.get()
+        if run is not None:
+            run.partial = True
+        output = self.partial_output(intermediate_steps) if self.partial_output else ""
+        return AgentFinish({"output": output, "partial": True}, "Stopped at the request deadline")
+
+    async def _aiter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        # Both ainvoke and astream(_events) take their steps through here
+        run = _current_run.get()
+        if run is not None:
+            run.iterations += 1
+        remaining = remaining_seconds()
+        if remaining is not None and remaining <= 0:
+            yield self._partial_finish(intermediate_steps)
+            return
+
+        # A slow model call or tool is cut off at the deadline too, not only checked between steps.
+        # The step is collected before anything is yielded, so the timeout never fires in the caller's code.
+        async def collect_step():
+            return [
+                output async for output in super(DeadlineAgentExecutor, self)._aiter_next_step(
+                    name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager
+                )
+            ]
+
+        try:
+            step = await asyncio.wait_for(collect_step(), remaining)
+        except asyncio.TimeoutError:
+            # A timeout raised by a tool itself, before the deadline, is the tool's error
+            remaining = remaining_seconds()
+            if remaining is None or remaining > 0:
+                raise
+            step = [self._partial_finish(intermediate_steps)]
+        for output in step:
+            yield output
+
+    @contextmanager
+    def _tracked_run(self) -> Iterator[None]:
+        run = _AgentRun()
+        token = _current_run.set(run)
+        try:
+            yield
+        finally:
+            _current_run.reset(token)
+        _record(run)
+
+    async def _acall(self, inputs: Dict[str, Any], run_manager: Any = None) -> Dict[str, Any]:
+        with self._tracked_run():
+            outputs = await super()._acall(inputs, run_manager=run_manager)
+        outputs.setdefault("partial", False)
+        return outputs
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[AddableDict]:
+        with self._tracked_run():
+            async for chunk in super().astream(input, config, **kwargs):
+                yield chunk
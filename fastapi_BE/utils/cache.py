@@ -0,0 +1,266 @@
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class CacheBackend(ABC):
+    """Interface shared by every cache store, so callers can swap memory for disk"""
+
+    @abstractmethod
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        ...
+
+    def stats(self) -> Dict[str, float]:
+        return {}
+
+
+class TTLCache(CacheBackend):
+    """Thread-safe bounded LRU cache whose entries expire after a TTL or at an absolute deadline"""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Optional size-based bound on top of the entry count, `sizeof` weighs each value
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: len(value))
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remove(self, key: Hashable) -> tuple:
+        entry = self._data.pop(key)
+        self._bytes -= entry[2]
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        """Store `value`; `expires_at` is a unix timestamp and wins over `ttl`"""
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl is not None else None
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._data and (
+                len(self._data) > self.maxsize
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove(key)[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self._bytes,
+        }
+
+
+class DiskCache(CacheBackend):
+    """JSON-serializable values persisted one file per key, evicting the least recently written past `max_bytes`"""
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._bytes = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+    def _path(self, key: Hashable) -> str:
+        # Keys are expected to be digests already, so they are safe file names
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return default
+
+        if entry.get("expires_at") is not None and entry["expires_at"] <= time.time():
+            self._delete(path)
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return entry["value"]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl is not None else None
+
+        path = self._path(key)
+        data = json.dumps({"value": value, "expires_at": expires_at}).encode("utf-8")
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            # Write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._bytes += len(data) - old_size
+            if self.max_bytes is not None and self._bytes > self.max_bytes:
+                self._evict()
+
+    def _delete(self, path: str) -> None:
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._bytes -= size
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.is_file() and entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in entries:
+            if self._bytes <= self.max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._bytes -= size
+                self.evictions += 1
+            except OSError:
+                continue
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "bytes": self._bytes,
+        }
+
+
+class TieredCache(CacheBackend):
+    """Memory cache in front of an optional persistent one, disk hits are promoted to memory"""
+
+    def __init__(self, memory: TTLCache, persistent: Optional[CacheBackend] = None):
+        self.memory = memory
+        self.persistent = persistent
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.memory.get(key)
+        if value is not None or self.persistent is None:
+            return default if value is None else value
+
+        value = self.persistent.get(key)
+        if value is None:
+            return default
+        self.memory.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        self.memory.set(key, value, ttl=ttl, expires_at=expires_at)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, value, ttl=ttl, expires_at=expires_at)
+            except OSError as e:
+                print(f"Error persisting cache entry {key} -> {e}")
+
+    def stats(self) -> Dict[str, Dict]:
+        stats = {"memory": self.memory.stats()}
+        if self.persistent is not None:
+            stats["persistent"] = self.persistent.stats()
+        return stats
+
+
+def build_cache(
+    backend: str,
+    maxsize: int = 1024,
+    ttl: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+    directory: Optional[str] = None
+) -> Optional[CacheBackend]:
+    """Build a cache from configuration.
+
+    `backend` is "memory", "disk" (memory in front of files under `directory`), "none",
+    or "package.module:factory" for a custom store; the factory gets the same keyword arguments.
+    """
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return TTLCache(maxsize=maxsize, ttl=ttl, max_bytes=max_bytes)
+    if backend == "disk":
+        if not directory:
+            raise ValueError("The disk cache backend needs a directory")
+        return TieredCache(
+            TTLCache(maxsize=maxsize, ttl=ttl),
+            DiskCache(directory, max_bytes=max_bytes, ttl=ttl)
+        )
+    if ":" in backend:
+        module_name, factory_name = backend.split(":", 1)
+        factory = getattr(importlib.import_module(module_name), factory_name)
+        return factory(maxsize=maxsize, ttl=ttl, max_bytes=max_bytes, directory=directory)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -1,32 +1,44 @@
-from typing import Dict
+from typing import AsyncIterator, Dict, Optional, Tuple
 from fastapi import HTTPException
+import httpx
 import traceback
 from dotenv import load_dotenv
 import PyPDF2
 from io import BytesIO
 import base64
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from core.config import settings
+from utils.llm import build_chat_model
+from utils.llm_cache import LLMResponseCache
 from utils.resume_jobs import ResumeProcessor
+from utils.uploads import IngestedUpload
 
 load_dotenv()
 
 class CoverLetterGenerator:
-    def __init__(self):
-        self.model = ChatOpenAI(
-            api_key=settings.sambanova_api_key,
-            base_url="https://api.sambanova.ai/v1",
-            model="Meta-Llama-3.1-70B-Instruct",
+    def __init__(
+        self,
+        resume_processor: ResumeProcessor,
+        http_async_client: Optional[httpx.AsyncClient] = None,
+        llm_cache: Optional[LLMResponseCache] = None
+    ):
+        self.llm_cache = llm_cache or LLMResponseCache()
+        self.model = build_chat_model(
+            "Meta-Llama-3.1-70B-Instruct",
+            http_async_client=http_async_client,
             temperature=0.7
         )
-        self.resume_processor = ResumeProcessor()
+        # Shared processor, used for text extraction and prompt compaction
+        self.resume_processor = resume_processor
 
-    async def generate_cover_letter(self, resume_text: str, job_description: str) -> str:
-        """Generate a cover letter based on resume and job description"""
-        try:
-            prompt = f"""Generate a professional cover letter based on the following resume and job description. 
+    async def _build_prompt(self, resume_text: str, job_description: str) -> str:
+        compactor = self.resume_processor.compactor
+        resume_text = await compactor.compact(resume_text, "cover_letter.resume", settings.resume_prompt_token_budget)
+        job_description = await compactor.compact(
+            job_description, "cover_letter.job_description", settings.job_description_prompt_token_budget, kind="job description"
+        )
+        return f"""Generate a professional cover letter based on the following resume and job description. 
             The cover letter should highlight relevant skills and experiences that match the job requirements.
             
             Resume:
@@ -41,37 +53,61 @@ class CoverLetterGenerator:
             3. Shows enthusiasm for the role and company
             4. Concludes professionally
             """
-            
-            response = await self.model.ainvoke([SystemMessage(content=prompt)])
+
+    async def generate_cover_letter(self, resume_text: str, job_description: str) -> str:
+        """Generate a cover letter based on resume and job description"""
+        try:
+            prompt = await self._build_prompt(resume_text, job_description)
+            response = await self.llm_cache.ainvoke(self.model, [SystemMessage(content=prompt)], site="cover_letter.generate")
             return response.content
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error generating cover letter: {str(e)}")
 
+    async def stream_cover_letter(self, resume_text: str, job_description: str) -> AsyncIterator[str]:
+        """Generate a cover letter, yielding tokens as the model produces them"""
+        prompt = await self._build_prompt(resume_text, job_description)
+        async for chunk in self.model.astream([SystemMessage(content=prompt)]):
+            if chunk.content:
+                yield chunk.content
+
+
+async def extract_cover_letter_inputs(
+    resume: IngestedUpload,
+    resume_type: str,
+    job_description: str = None,
+    job_description_file: Optional[IngestedUpload] = None,
+    job_description_type: str = None,
+    generator: CoverLetterGenerator = None
+) -> Tuple[str, str]:
+    """Extract the resume text and the job description text"""
+    # Extract resume text
+    resume_text = await generator.resume_processor.extract_text(resume.getbuffer(), resume_type, digest=resume.digest)
+    
+    # Process job description
+    if job_description_type == "text" or job_description_file is None:
+        job_desc_text = job_description
+    else:
+        job_desc_text = await generator.resume_processor.extract_text(
+            job_description_file.getbuffer(),
+            job_description_type,
+            digest=job_description_file.digest
+        )
+    return resume_text, job_desc_text
+
+
 async def process_cover_letter(
-    resume_content: bytes,
+    resume: IngestedUpload,
     resume_type: str,
     job_description: str = None,
-    job_description_file: bytes = None,
-    job_description_type: str = None
+    job_description_file: Optional[IngestedUpload] = None,
+    job_description_type: str = None,
+    generator: CoverLetterGenerator = None
 ) -> Dict:
     """Process resume and job description to generate a cover letter"""
     try:
-        generator = CoverLetterGenerator()
-        
-        # Extract resume text
-        if resume_type == "pdf":
-            resume_text = await generator.resume_processor.extract_text_from_pdf(resume_content)
-        else:
-            resume_text = await generator.resume_processor.extract_text_from_image(resume_content)
-        
-        # Process job description
-        if job_description_type == "text":
-            job_desc_text = job_description
-        else:
-            if job_description_type == "pdf":
-                job_desc_text = await generator.resume_processor.extract_text_from_pdf(job_description_file)
-            else:
-                job_desc_text = await generator.resume_processor.extract_text_from_image(job_description_file)
+        resume_text, job_desc_text = await extract_cover_letter_inputs(
+            resume, resume_type, job_description, job_description_file, job_description_type, generator
+        )
         
         # Generate cover letter
         cover_letter = await generator.generate_cover_letter(resume_text, job_desc_text)
@@ -82,8 +118,38 @@ async def process_cover_letter(
             "job_description": job_desc_text
         }
         
+    except HTTPException:
+        # Keeps the status extraction chose, a corrupt upload is the client's 400
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def stream_cover_letter_events(
+    resume: IngestedUpload,
+    resume_type: str,
+    job_description: str = None,
+    job_description_file: Optional[IngestedUpload] = None,
+    job_description_type: str = None,
+    generator: CoverLetterGenerator = None
+) -> AsyncIterator[Dict]:
+    """Yield the extracted inputs first, then cover letter tokens as they arrive, then the full letter"""
+    try:
+        resume_text, job_desc_text = await extract_cover_letter_inputs(
+            resume, resume_type, job_description, job_description_file, job_description_type, generator
+        )
+        yield {"event": "extracted", "resume_text": resume_text, "job_description": job_desc_text}
+
+        tokens = []
+        async for token in generator.stream_cover_letter(resume_text, job_desc_text):
+            tokens.append(token)
+            yield {"event": "token", "content": token}
+
+        yield {"event": "done", "cover_letter": "".join(tokens)}
+
+    except Exception as e:
+        # Headers are already sent, errors can only be reported in the stream
+        traceback.print_exc()
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        yield {"event": "error", "detail": detail}
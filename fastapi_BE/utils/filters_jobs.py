@@ -1,15 +1,20 @@
-from typing import Dict, List, Optional
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
 from fastapi import HTTPException
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
+import httpx
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.agents import create_openai_functions_agent, AgentExecutor
+from langchain.agents import create_openai_functions_agent
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain.output_parsers import PydanticOutputParser
-import json
 import traceback
 from core.config import settings
+from utils.agent_deadline import DeadlineAgentExecutor, agent_deadline
+from utils.job_store import JobPostingStore, normalize_link, posting_key
+from utils.job_match_stream import JobMatchStreamParser, partial_matches_output, stream_agent_job_matches
+from utils.llm import build_chat_model
+from utils.tracing import agent_callbacks, span
 
 class JobMatch(BaseModel):
     job_title: str
@@ -26,22 +31,34 @@ class JobMatch(BaseModel):
 class JobMatchesResponse(BaseModel):
     matches: List[JobMatch] = Field(description="List of matching job opportunities")
     search_summary: Optional[str] = Field(description="Summary of the job search results", default=None)
+    partial: bool = Field(description="True when the search stopped at its deadline", default=False)
 
 class JobSearchProcessor:
-    def __init__(self):
-        self.model = ChatOpenAI(
-            api_key=settings.sambanova_api_key,
-            base_url="https://api.sambanova.ai/v1",
-            model="Meta-Llama-3.1-70B-Instruct",
+    def __init__(
+        self,
+        http_async_client: Optional[httpx.AsyncClient] = None,
+        search_tool: Optional[TavilySearchResults] = None,
+        job_store: Optional[JobPostingStore] = None
+    ):
+        self.job_store = job_store
+        self.model = build_chat_model(
+            "Meta-Llama-3.1-70B-Instruct",
+            http_async_client=http_async_client,
             temperature=0.7
         )
+        # Pipeline mode extracts from search results it was given, no sampling needed
+        self.extraction_model = build_chat_model(
+            "Meta-Llama-3.1-70B-Instruct",
+            http_async_client=http_async_client,
+            temperature=0
+        )
         self.output_parser = PydanticOutputParser(pydantic_object=JobMatchesResponse)
-        self.setup_agent()
+        self.setup_agent(search_tool)
 
-    def setup_agent(self):
+    def setup_agent(self, search_tool: Optional[TavilySearchResults] = None):
         """Set up the LangChain agent with necessary tools and prompts"""
         # Create tools
-        self.search_tool = TavilySearchResults()
+        self.search_tool = search_tool or TavilySearchResults()
         
         # Define the system message
         system_message = """You are an expert job search assistant. Your task is to search for relevant job opportunities based on 
@@ -64,6 +81,8 @@ class JobSearchProcessor:
         Focus on finding current and relevant job postings that closely match the provided filters.
         """
         
+        self.system_message = system_message
+
         # Create prompt template
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", system_message),
@@ -78,10 +97,11 @@ class JobSearchProcessor:
             tools=[self.search_tool]
         )
 
-        self.agent_executor = AgentExecutor(
+        self.agent_executor = DeadlineAgentExecutor(
             agent=self.agent,
             tools=[self.search_tool],
-            verbose=True
+            partial_output=partial_matches_output,
+            verbose=False
         )
 
     def _build_search_criteria(self, filters: Dict) -> str:
@@ -112,67 +132,239 @@ class JobSearchProcessor:
         
         return "\n".join(criteria_parts)
 
-    async def search_jobs(self, filters: Dict) -> JobMatchesResponse:
-        """Search for relevant jobs based on provided filters"""
+    def _agent_inputs(self, filters: Dict) -> Dict:
+        """Build the agent input from the search filters"""
+        # Create search criteria message
+        search_criteria = self._build_search_criteria(filters)
+        
+        # Create message for the agent
+        messages = [
+            HumanMessage(content=f"""Please search for job opportunities matching the following criteria:
+
+            {search_criteria}
+
+            Find at least 10 or more relevant positions that best match these requirements. Format the response as a JSON object with 'matches' 
+            and 'search_summary' fields. Each job match should include all required fields as specified in the system message.""")
+        ]
+        return {
+            "input": messages[0].content,
+            "chat_history": messages
+        }
+
+    def _build_search_queries(self, filters: Dict) -> List[str]:
+        """Web search queries built directly from the filters, most specific first"""
+        title = filters["job_title"]
+        place = " ".join(part for part in (filters.get("work_type"), filters.get("location")) if part)
+        technologies = " ".join(filters.get("technologies") or [])
+
+        queries = [f"{title} jobs {place}".strip()]
+        if technologies:
+            queries.append(f"{title} {technologies} job openings")
+        if filters.get("required_experience"):
+            queries.append(f"{title} {filters['required_experience']} experience hiring {place}".strip())
+        if filters.get("company"):
+            queries.append(f"{filters['company']} careers {title}")
+        if filters.get("salary_range"):
+            queries.append(f"{title} jobs salary {filters['salary_range']} {place}".strip())
+
+        unique_queries = list(dict.fromkeys(" ".join(query.split()) for query in queries))
+        return unique_queries[:settings.job_search_pipeline_max_queries]
+
+    async def _search_all(self, queries: List[str]) -> List[Dict]:
+        """Run every query at once and merge the hits rank by rank, dropping repeated URLs"""
+        with span("search_fanout"):
+            results = await asyncio.gather(
+                *(self.search_tool.ainvoke({"query": query}) for query in queries),
+                return_exceptions=True
+            )
+
+        hit_lists = []
+        for query, result in zip(queries, results):
+            if isinstance(result, list):
+                hit_lists.append(result)
+            else:
+                # The tool returns its error as a string, one failed query should not fail the search
+                print(f"Search query failed: {query} -> {result}")
+
+        hits = []
+        seen_urls = set()
+        for rank in range(max((len(hit_list) for hit_list in hit_lists), default=0)):
+            for hit_list in hit_lists:
+                if rank >= len(hit_list) or not isinstance(hit_list[rank], dict):
+                    continue
+                hit = hit_list[rank]
+                url_key = normalize_link(hit.get("url"))
+                if url_key is None or url_key in seen_urls:
+                    continue
+                seen_urls.add(url_key)
+                hits.append(hit)
+        return hits[:settings.job_search_pipeline_max_results]
+
+    def _extraction_messages(self, filters: Dict, hits: List[Dict]) -> List:
+        results = "\n\n".join(
+            f"[{number}] {hit['url']}\n{hit.get('content', '')}" for number, hit in enumerate(hits, start=1)
+        )
+        return [
+            SystemMessage(content=self.system_message),
+            HumanMessage(content=f"""Extract the job openings from these web search results that match the following criteria:
+
+            {self._build_search_criteria(filters)}
+
+            Search results:
+            {results}
+
+            Only include jobs that appear in the search results, and use the result URL as application_link.
+            Only return the JSON object with 'matches' and 'search_summary' fields, no other text.""")
+        ]
+
+    async def _pipeline_messages(self, filters: Dict) -> Optional[List]:
+        hits = await self._search_all(self._build_search_queries(filters))
+        return self._extraction_messages(filters, hits) if hits else None
+
+    async def search_jobs_pipeline(self, filters: Dict) -> JobMatchesResponse:
+        """Search with queries built from the filters, then extract the matches in one model call"""
+        try:
+            messages = await self._pipeline_messages(filters)
+            if messages is None:
+                return JobMatchesResponse(matches=[], search_summary="No search results found for these filters")
+
+            with span("extract"):
+                response = await self.extraction_model.ainvoke(messages)
+
+            parser = JobMatchStreamParser(JobMatch, JobMatchesResponse)
+            parser.feed(response.content)
+            return parser.response(response.content)
+
+        except Exception as e:
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Error searching jobs: {str(e)}")
+
+    async def _stored_matches(self, filters: Dict) -> List[Dict]:
+        """Recent postings from the job store that match the filters"""
+        if self.job_store is None:
+            return []
+        with span("job_store"):
+            return await asyncio.to_thread(self.job_store.search, filters, settings.job_store_max_results)
+
+    def _answered_locally(self, stored: List[Dict]) -> bool:
+        if self.job_store is None or len(stored) < settings.job_store_min_results:
+            return False
+        self.job_store.metrics["answered_locally"] += 1
+        return True
+
+    async def _top_up(self, stored: List[Dict], fresh: JobMatchesResponse) -> JobMatchesResponse:
+        """Record the fresh matches in the job store and append the stored ones they do not repeat"""
+        if self.job_store is None:
+            return fresh
+        self.job_store.metrics["topped_up"] += 1
+        fresh_jobs = [match.dict() for match in fresh.matches]
         try:
-            # Create search criteria message
-            search_criteria = self._build_search_criteria(filters)
-            
-            # Create message for the agent
-            messages = [
-                HumanMessage(content=f"""Please search for job opportunities matching the following criteria:
+            await asyncio.to_thread(self.job_store.record, fresh_jobs, "job_search")
+        except Exception as e:
+            # The store is an optimization, a failed write must not fail the search
+            print(f"Error recording job postings -> {e}")
+        seen = {posting_key(job) for job in fresh_jobs}
+        extra = [JobMatch(**job) for job in stored if posting_key(job) not in seen]
+        return fresh.copy(update={"matches": fresh.matches + extra})
 
-                {search_criteria}
+    async def search(self, filters: Dict, mode: Optional[str] = None) -> JobMatchesResponse:
+        """Answer from the job store when it has enough recent matches, otherwise search in the requested mode.
 
-                Find at least 10 or more relevant positions that best match these requirements. Format the response as a JSON object with 'matches' 
-                and 'search_summary' fields. Each job match should include all required fields as specified in the system message.""")
-            ]
+        "agent" lets the model drive the searches, "pipeline" runs them up front.
+        """
+        stored = await self._stored_matches(filters)
+        if self._answered_locally(stored):
+            return JobMatchesResponse(matches=stored, search_summary=f"Found {len(stored)} matching jobs from recent searches")
+
+        if (mode or settings.job_search_mode) == "pipeline":
+            fresh = await self.search_jobs_pipeline(filters)
+        else:
+            fresh = await self.search_jobs(filters)
+        return await self._top_up(stored, fresh)
 
+    async def search_jobs(self, filters: Dict) -> JobMatchesResponse:
+        """Search for relevant jobs based on provided filters"""
+        try:
             # Execute search
-            response = await self.agent_executor.ainvoke({
-                "input": messages[0].content,
-                "chat_history": messages
-            })
-
-            # Parse response
-            try:
-                response_text = response["output"]
-                try:
-                    json_data = json.loads(response_text)
-                except json.JSONDecodeError:
-                    # Try to find JSON structure in text
-                    import re
-                    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                    if json_match:
-                        json_data = json.loads(json_match.group())
-                    else:
-                        raise ValueError("No JSON structure found in response")
-
-                # Parse into Pydantic model
-                parsed_response = JobMatchesResponse(**json_data)
-                return parsed_response
-
-            except Exception as parsing_error:
-                print(f"Error parsing response: {parsing_error}")
-                print(f"Raw response: {response['output']}")
-                return JobMatchesResponse(
-                    matches=[],
-                    search_summary=f"Error parsing job matches. Raw response: {response['output']}"
+            with span("agent"), agent_deadline(settings.agent_deadline_seconds):
+                response = await self.agent_executor.ainvoke(
+                    self._agent_inputs(filters),
+                    config={"callbacks": agent_callbacks()}
                 )
 
+            # Parse response in one pass, keeping every valid match even if the tail is malformed
+            parser = JobMatchStreamParser(JobMatch, JobMatchesResponse)
+            parser.feed(response["output"])
+            return parser.response(response["output"], response.get("partial", False))
+
         except Exception as e:
             traceback.print_exc()
             raise HTTPException(status_code=500, detail=f"Error searching jobs: {str(e)}")
 
-async def process_job_search(filters: Dict) -> Dict:
+    async def stream_search_jobs(self, filters: Dict, mode: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Yield the stored matches first, then, unless they are enough, each new match as soon as the model has written it"""
+        stored = await self._stored_matches(filters)
+        for job in stored:
+            yield {"event": "match", "match": job}
+        if self._answered_locally(stored):
+            response = JobMatchesResponse(matches=stored, search_summary=f"Found {len(stored)} matching jobs from recent searches")
+            yield {"event": "done", "job_matches": response.dict()}
+            return
+
+        seen = {posting_key(job) for job in stored}
+        async for event in self._stream_fresh(filters, mode):
+            if event["event"] == "match":
+                key = posting_key(event["match"])
+                if key in seen:
+                    continue
+                seen.add(key)
+            elif event["event"] == "done":
+                response = await self._top_up(stored, JobMatchesResponse(**event["job_matches"]))
+                event = {"event": "done", "job_matches": response.dict()}
+            yield event
+
+    async def _stream_fresh(self, filters: Dict, mode: Optional[str] = None) -> AsyncIterator[Dict]:
+        parser = JobMatchStreamParser(JobMatch, JobMatchesResponse)
+        if (mode or settings.job_search_mode) == "pipeline":
+            messages = await self._pipeline_messages(filters)
+            if messages is None:
+                empty = JobMatchesResponse(matches=[], search_summary="No search results found for these filters")
+                yield {"event": "done", "job_matches": empty.dict()}
+                return
+
+            raw_output = ""
+            async for chunk in self.extraction_model.astream(messages):
+                if isinstance(chunk.content, str) and chunk.content:
+                    raw_output += chunk.content
+                    for match in parser.feed(chunk.content):
+                        yield {"event": "match", "match": match.dict()}
+            yield {"event": "done", "job_matches": parser.response(raw_output).dict()}
+            return
+
+        with agent_deadline(settings.agent_deadline_seconds):
+            async for event in stream_agent_job_matches(self.agent_executor, self._agent_inputs(filters), parser):
+                yield event
+
+async def process_job_search(filters: Dict, processor: JobSearchProcessor, mode: Optional[str] = None) -> Dict:
     """Process job search request and return matches"""
     try:
-        processor = JobSearchProcessor()
-        job_matches = await processor.search_jobs(filters)
+        job_matches = await processor.search(filters, mode)
         
         return {
             "job_matches": job_matches.dict()
         }
     except Exception as e:
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def stream_job_search_events(filters: Dict, processor: JobSearchProcessor, mode: Optional[str] = None) -> AsyncIterator[Dict]:
+    """Yield a "match" event per job as the model produces it, then "done" with the full response"""
+    try:
+        async for event in processor.stream_search_jobs(filters, mode):
+            yield event
+    except Exception as e:
+        # Headers are already sent, errors can only be reported in the stream
+        traceback.print_exc()
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        yield {"event": "error", "detail": detail}
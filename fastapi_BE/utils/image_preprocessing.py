@@ -0,0 +1,134 @@
+import io
+import time
+from typing import Dict, Union
+from PIL import Image, ImageOps
+
+# Running totals for /metrics, updated from the event loop once each image is done
+preprocessing_stats: Dict[str, float] = {
+    "images": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "bytes_saved": 0,
+    "preprocess_seconds": 0.0,
+    "vision_seconds": 0.0,
+}
+
+
+class PreparedImage:
+    """Image payload ready for the vision model, with what preprocessing saved"""
+
+    def __init__(self, content: bytes, mime_type: str, original_mime_type: str,
+                 original_size: int, original_dimensions: tuple, dimensions: tuple, elapsed: float):
+        self.content = content
+        self.mime_type = mime_type
+        self.original_mime_type = original_mime_type
+        self.original_size = original_size
+        self.original_dimensions = original_dimensions
+        self.dimensions = dimensions
+        self.elapsed = elapsed
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_size - len(self.content)
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable file over a buffer without copying it, io.BytesIO would copy a memoryview up front"""
+
+    def __init__(self, content: Union[bytes, memoryview]):
+        self._view = memoryview(content)
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        with self._view[self._position:self._position + len(buffer)] as chunk:
+            size = len(chunk)
+            buffer[:size] = chunk
+        self._position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        # The upload's spool cannot be closed or resized while a view of it is alive, and a
+        # traceback that keeps this reader's frames around would otherwise keep the view too
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def prepare_vision_image(content: Union[bytes, memoryview], max_side: int, quality: int) -> PreparedImage:
+    """Detect the real format, auto-orient, downscale, convert to grayscale and recompress as JPEG.
+
+    Blocking, run it in a worker thread.
+    """
+    started = time.perf_counter()
+    original_size = len(content)
+    recompressed = None
+    with io.BufferedReader(_BufferReader(content)) as reader:
+        try:
+            recompressed = _recompress(Image.open(reader), max_side, quality)
+        except OSError:
+            # UnidentifiedImageError for unknown formats, plain OSError for truncated or broken image data
+            pass
+    if recompressed is None:
+        # Raised once the reader is closed, so the error holds no view of the upload
+        raise ValueError("Unsupported or corrupt image file")
+    prepared, original_mime_type, original_dimensions, dimensions = recompressed
+
+    # Small, already compact uploads can come out larger, send those untouched
+    if len(prepared) >= original_size and original_dimensions[0] <= max_side and original_dimensions[1] <= max_side:
+        # The only copy of the upload, made for the one path that sends it as is
+        return PreparedImage(bytes(content), original_mime_type, original_mime_type, original_size,
+                             original_dimensions, original_dimensions, time.perf_counter() - started)
+
+    return PreparedImage(prepared, "image/jpeg", original_mime_type, original_size,
+                         original_dimensions, dimensions, time.perf_counter() - started)
+
+
+def _recompress(image: Image.Image, max_side: int, quality: int) -> tuple:
+    """Grayscale JPEG bytes of the image, its original MIME type and dimensions, and the new dimensions"""
+    with image:
+        original_mime_type = Image.MIME.get(image.format, "application/octet-stream")
+        original_dimensions = image.size
+
+        # Let the JPEG decoder downscale by a power of two while decoding, much cheaper than a full decode
+        if image.format == "JPEG":
+            image.draft("L", (max_side, max_side))
+
+        processed = ImageOps.exif_transpose(image).convert("L")
+        processed.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        output = io.BytesIO()
+        processed.save(output, format="JPEG", quality=quality, optimize=True)
+        return output.getvalue(), original_mime_type, original_dimensions, processed.size
+
+
+def record_preprocessing(prepared: PreparedImage, vision_seconds: float) -> None:
+    """Bytes saved and the time preprocessing cost, next to the vision call it fed.
+
+    Time saved needs the unprocessed image timed too, a second vision call per upload, so it is
+    measured by benchmarks.bench_image_preprocessing --vision instead of here.
+    """
+    preprocessing_stats["images"] += 1
+    preprocessing_stats["bytes_in"] += prepared.original_size
+    preprocessing_stats["bytes_out"] += len(prepared.content)
+    preprocessing_stats["bytes_saved"] += prepared.bytes_saved
+    preprocessing_stats["preprocess_seconds"] += prepared.elapsed
+    preprocessing_stats["vision_seconds"] += vision_seconds
+    print(
+        f"Vision image {prepared.original_mime_type} {prepared.original_dimensions} -> "
+        f"{prepared.mime_type} {prepared.dimensions}: {prepared.original_size} -> {len(prepared.content)} bytes "
+        f"({prepared.bytes_saved} saved), preprocess {prepared.elapsed * 1000:.0f}ms, vision {vision_seconds:.2f}s"
+    )
@@ -0,0 +1,255 @@
+import json
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel
+from utils.tracing import agent_callbacks
+
+# Characters that change the scanner state outside and inside strings, everything else is skipped in bulk
+_STRUCTURAL = re.compile(r'["{}\[\],]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "item_start", "objects")
+
+    def __init__(self, kind: str, key: Optional[str], item_start: Optional[int]):
+        self.kind = kind
+        self.key = key
+        self.item_start = item_start
+        self.objects = 0
+
+
+class JobMatchStreamParser:
+    """Single-pass parser for the agent's JSON answer that yields each job match as soon as its object closes.
+
+    Text before the JSON (prose, code fences) is skipped. Each object in the top-level "matches"
+    array (or in a bare top-level array) is validated on its own, so a malformed or truncated
+    tail only loses the matches after it. Only the object currently being read is kept in memory.
+    """
+
+    def __init__(self, item_model: Type[BaseModel], response_model: Type[BaseModel]):
+        self.item_model = item_model
+        self.response_model = response_model
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything fed so far, to parse a different output from the start"""
+        self.matches: List[BaseModel] = []
+        self.invalid_matches = 0
+        self.search_summary: Optional[str] = None
+        self.complete = False
+
+        self._buffer = ""
+        self._offset = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        self._expect_key = False
+        self._pending_key: Optional[str] = None
+        self._has_matches_key = False
+
+    def _slice(self, start: int, end: int) -> str:
+        return self._buffer[start - self._offset:end - self._offset]
+
+    def _in_matches_array(self) -> bool:
+        if not self._stack or self._stack[-1].kind != "[":
+            return False
+        if len(self._stack) == 1:
+            return True
+        return len(self._stack) == 2 and self._stack[0].kind == "{" and self._stack[1].key == "matches"
+
+    def _close_string(self, end: int) -> None:
+        # Only root-level keys and the summary value are needed, deeper strings are never decoded
+        if len(self._stack) != 1 or self._stack[0].kind != "{":
+            return
+        try:
+            value = json.loads(self._slice(self._string_start, end + 1))
+        except ValueError:
+            return
+        if self._string_is_key:
+            self._pending_key = value
+            if value == "matches":
+                self._has_matches_key = True
+        elif self._pending_key == "search_summary":
+            self.search_summary = value
+
+    def _close_item(self, start: int, end: int) -> Optional[BaseModel]:
+        try:
+            match = self.item_model(**json.loads(self._slice(start, end + 1)))
+        except (ValueError, TypeError) as e:
+            self.invalid_matches += 1
+            print(f"Skipping invalid job match: {str(e).splitlines()[0]}")
+            return None
+        self.matches.append(match)
+        return match
+
+    def _close_container(self, position: int) -> Optional[BaseModel]:
+        frame = self._stack.pop()
+        self._expect_key = False
+        match = None
+        if frame.item_start is not None:
+            match = self._close_item(frame.item_start, position)
+            if self._stack:
+                self._stack[-1].objects += 1
+        if not self._stack:
+            if self.matches or self._has_matches_key or (frame.kind == "[" and frame.objects):
+                self.complete = True
+            else:
+                # A stray {...} or [...] of non-objects in the prose before the answer, keep looking
+                self._pending_key = None
+        return match
+
+    def feed(self, chunk: str) -> List[BaseModel]:
+        """Consume the next piece of output, returning the job matches completed by it"""
+        if self.complete or not chunk:
+            return []
+
+        position = self._offset + len(self._buffer)
+        self._buffer += chunk
+        end = self._offset + len(self._buffer)
+        completed = []
+
+        while position < end and not self.complete:
+            if self._in_string:
+                if self._escape:
+                    # The previous chunk ended on a backslash, this character is the escaped one
+                    self._escape = False
+                    position += 1
+                    continue
+                found = _STRING_SPECIAL.search(self._buffer, position - self._offset)
+                if found is None:
+                    position = end
+                    break
+                position = self._offset + found.start()
+                if found.group() == "\\":
+                    # The escaped character may be a quote, skip it whatever it is
+                    if position + 1 < end:
+                        position += 1
+                    else:
+                        self._escape = True
+                else:
+                    self._in_string = False
+                    self._close_string(position)
+                position += 1
+                continue
+
+            found = _STRUCTURAL.search(self._buffer, position - self._offset)
+            if found is None:
+                position = end
+                break
+            position = self._offset + found.start()
+            char = found.group()
+
+            if not self._stack:
+                if char in "{[":
+                    self._stack.append(_Frame(char, None, None))
+                    self._expect_key = char == "{"
+                position += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = position
+                self._string_is_key = self._stack[-1].kind == "{" and self._expect_key
+                self._expect_key = False
+            elif char in "{[":
+                item_start = position if char == "{" and self._in_matches_array() else None
+                key = self._pending_key if len(self._stack) == 1 and self._stack[0].kind == "{" else None
+                self._stack.append(_Frame(char, key, item_start))
+                self._expect_key = char == "{"
+            elif char in "}]":
+                match = self._close_container(position)
+                if match is not None:
+                    completed.append(match)
+            elif char == ",":
+                self._expect_key = self._stack[-1].kind == "{"
+            position += 1
+
+        self._trim(position)
+        return completed
+
+    def _trim(self, position: int) -> None:
+        keep_from = position
+        for frame in self._stack:
+            if frame.item_start is not None:
+                keep_from = min(keep_from, frame.item_start)
+        if self._in_string:
+            keep_from = min(keep_from, self._string_start)
+        if keep_from > self._offset:
+            self._buffer = self._buffer[keep_from - self._offset:]
+            self._offset = keep_from
+
+    def response(self, raw_output: Optional[str] = None, partial: bool = False) -> BaseModel:
+        """The parsed matches as a response model, noting when the output was cut short"""
+        search_summary = self.search_summary
+        if not self.complete:
+            if self.matches:
+                print(f"Agent output ended before the JSON closed, kept {len(self.matches)} job matches")
+                search_summary = search_summary or f"Partial results: {len(self.matches)} job matches parsed before the response was cut off"
+            else:
+                print(f"Error parsing response, raw response: {raw_output}")
+                search_summary = f"Error parsing job matches. Raw response: {raw_output}"
+        return self.response_model(matches=self.matches, search_summary=search_summary, partial=partial)
+
+
+def partial_matches_output(intermediate_steps: List[Tuple[Any, Any]]) -> str:
+    """Job matches JSON built from the search results an agent collected before it was stopped.
+
+    Only the link and the snippet are known, every other field is 'NA' as the prompts ask for
+    missing information.
+    """
+    matches = []
+    seen_urls = set()
+    for _, observation in intermediate_steps:
+        if not isinstance(observation, list):
+            continue
+        for result in observation:
+            url = result.get("url") if isinstance(result, dict) else None
+            if not url or url in seen_urls:
+                continue
+            seen_urls.add(url)
+            matches.append({
+                "job_title": "NA",
+                "required_experience": "NA",
+                "technologies": ["NA"],
+                "work_type": "NA",
+                "location": "NA",
+                "company": "NA",
+                "required_qualifications": ["NA"],
+                "application_link": url,
+                "job_description": result.get("content") or "NA",
+                "salary_range": "NA",
+            })
+    summary = f"Search stopped at its deadline, returning {len(matches)} unprocessed search results"
+    return json.dumps({"matches": matches, "search_summary": summary})
+
+
+async def stream_agent_job_matches(agent_executor: Any, inputs: Dict, parser: JobMatchStreamParser) -> AsyncIterator[Dict]:
+    """Run the agent and yield a "match" event per job as the final answer streams in, then "done"."""
+    final_output = None
+    partial = False
+    async for event in agent_executor.astream_events(inputs, config={"callbacks": agent_callbacks()}, version="v2"):
+        if event["event"] == "on_chat_model_start" and not parser.matches:
+            # Every agent turn streams, only the last one is the answer; a new turn discards
+            # whatever an earlier one fed without yielding a match
+            parser.reset()
+        elif event["event"] == "on_chat_model_stream":
+            content = event["data"]["chunk"].content
+            if isinstance(content, str) and content:
+                for match in parser.feed(content):
+                    yield {"event": "match", "match": match.dict()}
+        elif event["event"] == "on_chain_end" and not event.get("parent_ids"):
+            output = event["data"].get("output")
+            if isinstance(output, dict):
+                final_output = output.get("output")
+                partial = bool(output.get("partial"))
+
+    # The model may not have streamed its answer token by token, or the agent was stopped at its
+    # deadline and the output was built from its search results, parse the final output instead
+    if final_output and not parser.matches and not parser.complete:
+        parser.reset()
+        for match in parser.feed(final_output):
+            yield {"event": "match", "match": match.dict()}
+    yield {"event": "done", "job_matches": parser.response(final_output, partial).dict()}
@@ -0,0 +1,169 @@
+import hashlib
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from sqlalchemy import func, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+from models.models import JobPostings
+
+JOB_FIELDS = (
+    "job_title", "required_experience", "technologies", "work_type", "location", "company",
+    "required_qualifications", "application_link", "job_description", "salary_range",
+)
+_WORD = re.compile(r"[a-z0-9]+")
+_WORK_TYPES = {"on site": "onsite", "on-site": "onsite", "in office": "onsite", "in-office": "onsite", "office": "onsite"}
+# Query parameters that only say how a link was reached; the rest can identify the posting (jk, gh_jid, currentJobId)
+_TRACKING_PARAMS = {"ref", "refid", "trk", "trkinfo", "trackingid", "src", "source", "position", "pagenum", "gclid", "fbclid"}
+
+
+def _clean(value: Optional[str]) -> str:
+    return " ".join((value or "").split()).casefold()
+
+
+def normalize_work_type(work_type: Optional[str]) -> str:
+    work_type = _clean(work_type)
+    return _WORK_TYPES.get(work_type, work_type)
+
+
+def normalize_link(link: Optional[str]) -> Optional[str]:
+    """Scheme, "www.", tracking parameter, fragment and trailing slash free form of a URL, None when unusable.
+
+    The remaining query parameters are kept, sorted, since job boards put the posting id there.
+    """
+    parts = urlsplit((link or "").strip())
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return None
+    host = parts.netloc.lower().removeprefix("www.")
+    params = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in _TRACKING_PARAMS and not name.lower().startswith("utm_")
+    )
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{host}{parts.path.rstrip('/')}{query}"
+
+
+def posting_key(job: Dict) -> str:
+    link = normalize_link(job.get("application_link"))
+    source = f"link:{link}" if link else f"job:{_clean(job.get('company'))}|{_clean(job.get('job_title'))}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def _search_text(job: Dict) -> str:
+    parts = [job.get("job_title"), job.get("company"), job.get("location"), job.get("work_type")]
+    parts += list(job.get("technologies") or []) + list(job.get("required_qualifications") or [])
+    parts.append(job.get("job_description"))
+    return " ".join(part for part in parts if part and part != "NA")
+
+
+def _words(value: str) -> List[str]:
+    return _WORD.findall(value.casefold())
+
+
+class JobPostingStore:
+    """Every job seen by a search or saved by a user, deduplicated, for answering filter searches locally.
+
+    On Postgres matching uses the generated tsvector column and its GIN index; other databases
+    fall back to LIKE over the same search text.
+    """
+
+    def __init__(self, engine: Engine, max_age: float):
+        self.engine = engine
+        self.max_age = max_age
+        self.full_text = engine.dialect.name == "postgresql"
+        self.metrics = {"searches": 0, "answered_locally": 0, "topped_up": 0, "recorded": 0, "new_postings": 0}
+
+    def record(self, jobs: Iterable[Dict], source: str) -> int:
+        """Insert new postings and refresh the ones already known, returns how many were new"""
+        by_key = {}
+        for job in jobs:
+            if job.get("job_title") and job.get("job_title") != "NA":
+                by_key[posting_key(job)] = job
+        if not by_key:
+            return 0
+
+        for attempt in range(2):
+            try:
+                new_postings = self._upsert(by_key, source)
+                break
+            except IntegrityError:
+                # Another request inserted one of these keys first, the retry updates it instead
+                if attempt:
+                    raise
+        self.metrics["recorded"] += len(by_key)
+        self.metrics["new_postings"] += new_postings
+        return new_postings
+
+    def _upsert(self, by_key: Dict[str, Dict], source: str) -> int:
+        now = datetime.utcnow()
+        with Session(self.engine) as session:
+            existing = {
+                posting.dedupe_key: posting
+                for posting in session.exec(select(JobPostings).where(JobPostings.dedupe_key.in_(list(by_key))))
+            }
+            for key, job in by_key.items():
+                fields = {field: job.get(field) for field in JOB_FIELDS}
+                fields.update(
+                    search_work_type=normalize_work_type(job.get("work_type")),
+                    search_location=_clean(job.get("location")),
+                    search_text=_search_text(job),
+                    last_seen_at=now,
+                )
+                posting = existing.get(key)
+                if posting is None:
+                    session.add(JobPostings(**fields, dedupe_key=key, source=source, first_seen_at=now))
+                else:
+                    for field, value in fields.items():
+                        setattr(posting, field, value)
+                    session.add(posting)
+            session.commit()
+        return len(by_key) - len(existing)
+
+    def search(self, filters: Dict, limit: int) -> List[Dict]:
+        """Fresh postings matching the filters, best match first"""
+        self.metrics["searches"] += 1
+        title_words = _words(filters.get("job_title", ""))
+        technology_words = [word for technology in filters.get("technologies") or [] for word in _words(technology)]
+
+        statement = select(JobPostings).where(JobPostings.last_seen_at >= datetime.utcnow() - timedelta(seconds=self.max_age))
+        if filters.get("work_type"):
+            statement = statement.where(JobPostings.search_work_type == normalize_work_type(filters["work_type"]))
+        if filters.get("location"):
+            statement = statement.where(JobPostings.search_location.contains(_clean(filters["location"]), autoescape=True))
+        if filters.get("company"):
+            statement = statement.where(func.lower(JobPostings.company).contains(_clean(filters["company"]), autoescape=True))
+
+        params = {}
+        if self.full_text:
+            # Every title word must match, technologies only rank; the words are [a-z0-9]+ so they are valid tsquery lexemes
+            if title_words:
+                statement = statement.where(text("search_vector @@ to_tsquery('english', :title_query)"))
+                params["title_query"] = " & ".join(title_words)
+            rank_words = title_words + technology_words
+            if rank_words:
+                statement = statement.order_by(text("ts_rank(search_vector, to_tsquery('english', :rank_query)) DESC"))
+                params["rank_query"] = " | ".join(rank_words)
+            statement = statement.order_by(JobPostings.last_seen_at.desc()).limit(limit)
+            with Session(self.engine) as session:
+                postings = list(session.exec(statement, params=params))
+        else:
+            for word in title_words:
+                statement = statement.where(func.lower(JobPostings.search_text).contains(word))
+            with Session(self.engine) as session:
+                postings = list(session.exec(statement.order_by(JobPostings.last_seen_at.desc()).limit(limit * 5)))
+            # Rank by how many of the technologies each posting mentions, then by freshness
+            postings.sort(
+                key=lambda posting: (
+                    sum(word in posting.search_text.casefold() for word in technology_words),
+                    posting.last_seen_at
+                ),
+                reverse=True
+            )
+            postings = postings[:limit]
+
+        return [{field: getattr(posting, field) for field in JOB_FIELDS} for posting in postings]
+
+    def stats(self) -> Dict:
+        return dict(self.metrics)
@@ -0,0 +1,180 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+import aiohttp
+from core.config import settings
+from utils.metrics import counter, histogram
+
+linkedin_request_seconds = histogram(
+    "linkedin_request_duration_seconds", "LinkedIn guest API request latency per attempt", labels=("kind", "status")
+)
+linkedin_requests = counter(
+    "linkedin_requests", "LinkedIn guest API requests by final outcome", labels=("kind", "outcome")
+)
+linkedin_job_seconds = histogram(
+    "linkedin_job_fetch_duration_seconds", "Time to fetch one job posting, retries and queueing included", labels=("outcome",)
+)
+
+
+class LinkedInFetchError(Exception):
+    """A LinkedIn request that still failed after its retries"""
+
+    def __init__(self, url: str, reason: str, retryable: bool = True, retry_after: Optional[float] = None):
+        super().__init__(f"{reason} for {url}")
+        self.url = url
+        self.reason = reason
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def _retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    retry_after = headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class LinkedInHTTPClient:
+    """Process-wide session for the LinkedIn guest API: a cap on requests in flight, per-host
+    connection limits, timeouts, and backoff on 429 and 5xx that respects Retry-After"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_connections_per_host: int,
+        timeout: float,
+        connect_timeout: float,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # Created on first use, aiohttp sessions and semaphores belong to the loop they are used on
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._paused_until = 0.0
+
+        self.metrics: Dict[str, float] = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "jobs_fetched": 0,
+            "jobs_failed": 0,
+            "job_seconds_total": 0.0,
+        }
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._session is not None and not self._session.closed:
+            return
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                limit_per_host=self.max_connections_per_host
+            ),
+            timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=self.connect_timeout),
+            headers={"User-Agent": "Mozilla/5.0"}
+        )
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+            # Every request waits out a rate limit, not just the one that was told about it
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _attempt(self, url: str, kind: str) -> str:
+        """One request; failures raise LinkedInFetchError, with the delay the server asked for on a 429"""
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+        self.metrics["requests"] += 1
+        started = time.perf_counter()
+        status = "error"
+        try:
+            async with self._semaphore:
+                async with self._session.get(url) as response:
+                    status = str(response.status)
+                    if response.status == 429:
+                        self.metrics["rate_limited"] += 1
+                    if response.status == 429 or response.status >= 500:
+                        raise LinkedInFetchError(
+                            url, f"HTTP {response.status}", retry_after=_retry_after_seconds(response.headers)
+                        )
+                    if response.status >= 400:
+                        raise LinkedInFetchError(url, f"HTTP {response.status}", retryable=False)
+                    return await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise LinkedInFetchError(url, type(e).__name__) from e
+        finally:
+            linkedin_request_seconds.observe(time.perf_counter() - started, kind, status)
+
+    async def get_text(self, url: str, kind: str = "other") -> str:
+        """Body of a GET, retried on 429, 5xx, timeouts and connection errors"""
+        self._bind()
+        attempt = 0
+        while True:
+            try:
+                text = await self._attempt(url, kind)
+                linkedin_requests.inc(1, kind, "ok")
+                return text
+            except LinkedInFetchError as e:
+                if not e.retryable or attempt >= self.max_retries:
+                    self.metrics["failures"] += 1
+                    linkedin_requests.inc(1, kind, "failed")
+                    raise
+                self.metrics["retries"] += 1
+                delay = self._backoff(attempt, e.retry_after)
+                print(f"LinkedIn request failed ({e.reason}), retrying in {delay:.1f}s (attempt {attempt + 1})")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def record_job(self, seconds: float, ok: bool) -> None:
+        self.metrics["jobs_fetched" if ok else "jobs_failed"] += 1
+        self.metrics["job_seconds_total"] += seconds
+        linkedin_job_seconds.observe(seconds, "ok" if ok else "failed")
+
+    def stats(self) -> Dict:
+        jobs = self.metrics["jobs_fetched"] + self.metrics["jobs_failed"]
+        return {
+            **self.metrics,
+            "job_failure_rate": self.metrics["jobs_failed"] / jobs if jobs else 0.0,
+            "job_seconds_mean": self.metrics["job_seconds_total"] / jobs if jobs else 0.0,
+        }
+
+    async def aclose(self) -> None:
+        if self._session is not None and not self._session.closed and self._loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+
+
+linkedin_client = LinkedInHTTPClient(
+    max_concurrency=settings.linkedin_max_concurrency,
+    max_connections_per_host=settings.linkedin_max_connections_per_host,
+    timeout=settings.linkedin_timeout,
+    connect_timeout=settings.linkedin_connect_timeout,
+    max_retries=settings.linkedin_max_retries,
+    backoff_base=settings.linkedin_backoff_base,
+    backoff_max=settings.linkedin_backoff_max
+)
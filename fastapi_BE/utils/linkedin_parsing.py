@@ -0,0 +1,103 @@
+from typing import Callable, Dict, List, Optional
+from bs4 import BeautifulSoup
+import lxml.etree
+import lxml.html
+
+# Kept free of app imports, so these functions also run in worker processes
+
+JOB_POSTING_FIELDS = (
+    "job_title", "job_location", "company_name", "time_posted", "num_applicants", "job_desc_text", "apply_link",
+)
+
+# Class token that identifies each field's element on a jobPosting page, checked in this order
+_FIELD_CLASSES = (
+    ("num-applicants__caption", "num_applicants"),
+    ("posted-time-ago__text", "time_posted"),
+    ("topcard__title", "job_title"),
+    ("topcard__org-name-link", "company_name"),
+    ("decorated-job-posting__details", "job_desc_text"),
+    ("topcard__flavor--bullet", "job_location"),
+)
+
+
+def _parse_html(html: str) -> Optional[lxml.html.HtmlElement]:
+    """Root element of the page, None for an empty body or one lxml cannot parse"""
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.fromstring(html)
+    except (lxml.etree.LxmlError, ValueError):
+        # "Document is empty" for bodies without elements, ValueError for XML with an encoding declaration
+        return None
+
+
+def _posting_or_none(job_post: Dict[str, str]) -> Optional[Dict[str, str]]:
+    # A body without any of the fields is an error or login page, not a posting
+    return job_post if any(job_post.values()) else None
+
+
+def parse_job_ids(html: str) -> List[str]:
+    """Job ids of the cards on one seeMoreJobPostings page, an empty list past the last page"""
+    root = _parse_html(html)
+    if root is None:
+        return []
+    urns = root.xpath(
+        "//li//div[contains(concat(' ', normalize-space(@class), ' '), ' base-card ')]/@data-entity-urn"
+    )
+    return [urn.split(":")[3] for urn in urns if urn.count(":") >= 3]
+
+
+def parse_job_posting_bs4(html: str) -> Optional[Dict[str, str]]:
+    """BeautifulSoup with the pure-Python html.parser, one search per field"""
+    if not html or not html.strip():
+        return None
+    job_soup = BeautifulSoup(html, "html.parser")
+    lookups = {
+        "job_title": ("h2", {"class": "top-card-layout__title font-sans text-lg papabear:text-xl font-bold leading-open text-color-text mb-0 topcard__title"}),
+        "job_location": ("span", {"class": "topcard__flavor topcard__flavor--bullet"}),
+        "company_name": ("a", {"class": "topcard__org-name-link topcard__flavor--black-link"}),
+        "time_posted": ("span", {"class": "posted-time-ago__text topcard__flavor--metadata"}),
+        "num_applicants": ("span", {"class": "num-applicants__caption topcard__flavor--metadata topcard__flavor--bullet"}),
+        "job_desc_text": ("div", {"class": "decorated-job-posting__details"}),
+    }
+    job_post = {}
+    for field, (tag, attrs) in lookups.items():
+        element = job_soup.find(tag, attrs)
+        job_post[field] = element.text.strip() if element is not None else ""
+    apply_link_tag = job_soup.find("a", class_="topcard__link")
+    job_post["apply_link"] = (apply_link_tag.get("href") or "") if apply_link_tag is not None else ""
+    return _posting_or_none(job_post)
+
+
+def parse_job_posting_lxml(html: str) -> Optional[Dict[str, str]]:
+    """lxml, every field found in a single walk over the elements that have a class"""
+    root = _parse_html(html)
+    if root is None:
+        return None
+    job_post = {}
+    for element in root.iter():
+        classes = element.get("class")
+        if not classes:
+            continue
+        tokens = classes.split()
+        if "topcard__link" in tokens and element.tag == "a":
+            job_post.setdefault("apply_link", element.get("href") or "")
+        for token, field in _FIELD_CLASSES:
+            if token in tokens:
+                if field not in job_post:
+                    job_post[field] = element.text_content().strip()
+                break
+        if len(job_post) == len(JOB_POSTING_FIELDS):
+            break
+    return _posting_or_none({field: job_post.get(field, "") for field in JOB_POSTING_FIELDS})
+
+
+PARSERS: Dict[str, Callable[[str], Optional[Dict[str, str]]]] = {
+    "lxml": parse_job_posting_lxml,
+    "html.parser": parse_job_posting_bs4,
+}
+
+
+def parse_job_posting(html: str, backend: str = "lxml") -> Optional[Dict[str, str]]:
+    """Fields of a jobPosting page, None when the body is empty or not a job posting"""
+    return PARSERS[backend](html)
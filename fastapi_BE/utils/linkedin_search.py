@@ -1,16 +1,14 @@
-# Will be implementing in our next steps
-
-
-from typing import Dict, List, Optional, Union, Literal
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Union, Literal
 from pydantic import BaseModel, Field
-import aiohttp
 import os
 import asyncio
-from bs4 import BeautifulSoup
-from linkedin_api import Linkedin
-from asgiref.sync import sync_to_async
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
 import urllib
+from core.config import settings
+from utils.linkedin_http import LinkedInFetchError, linkedin_client
+from utils.linkedin_parsing import parse_job_ids, parse_job_posting
+from utils.linkedin_sessions import LinkedInSessionPool, linkedin_sessions
 
 class JobMatch(BaseModel):
     job_title: str
@@ -25,9 +23,9 @@ class JobMatch(BaseModel):
     salary_range: str = "Not specified"
 
 class LinkedInSearchTool:
-    def __init__(self):
-        self.email = os.getenv("LINKEDIN_EMAIL")
-        self.password = os.getenv("LINKEDIN_PASS")
+    def __init__(self, sessions: LinkedInSessionPool = linkedin_sessions):
+        # Logged-in clients shared with every other LinkedIn API call in the process
+        self.sessions = sessions
 
     async def search_jobs(
         self,
@@ -63,13 +61,14 @@ class LinkedInSearchTool:
     async def _get_job_ids(self, keywords: str, location: str, experience: Optional[str], job_type: Optional[str], limit: int) -> List[str]:
         """Get job IDs from LinkedIn search"""
         try:
-            api = Linkedin(self.email, self.password)
-            job_postings = await sync_to_async(api.search_jobs)(
-                keywords=keywords,
-                location_name=location,
-                experience=experience,
-                remote=job_type,
-                limit=limit
+            job_postings = await self.sessions.run(
+                lambda api: api.search_jobs(
+                    keywords=keywords,
+                    location_name=location,
+                    experience=experience,
+                    remote=job_type,
+                    limit=limit
+                )
             )
             return [job["trackingUrn"].split("jobPosting:")[1] for job in job_postings]
         except Exception as e:
@@ -79,17 +78,16 @@ class LinkedInSearchTool:
     async def _fetch_job_details(self, job_ids: List[str]) -> List[Dict]:
         """Fetch details for multiple jobs"""
         try:
-            api = Linkedin(self.email, self.password)
-            tasks = [self._get_single_job_details(api, job_id) for job_id in job_ids]
+            tasks = [self._get_single_job_details(job_id) for job_id in job_ids]
             return await asyncio.gather(*tasks)
         except Exception as e:
             print(f"Error fetching job details: {str(e)}")
             return []
 
-    async def _get_single_job_details(self, api: Linkedin, job_id: str) -> Dict:
+    async def _get_single_job_details(self, job_id: str) -> Dict:
         """Get details for a single job"""
         try:
-            job_data = await sync_to_async(api.get_job)(job_id)
+            job_data = await self.sessions.run(lambda api: api.get_job(job_id))
             
             return {
                 "job_title": job_data.get("title", ""),
@@ -176,6 +174,22 @@ job_type_mapping = {
     "hybrid": "3",
 }
 
+# Cards per seeMoreJobPostings page, `start` advances by this much
+LINKEDIN_PAGE_SIZE = 10
+
+# Posting HTML is parsed on these threads so a search's worth of pages does not stall the event loop
+parse_executor = (
+    ThreadPoolExecutor(max_workers=settings.linkedin_parser_workers, thread_name_prefix="linkedin-parse")
+    if settings.linkedin_parser_workers > 0 else None
+)
+
+
+def _filter_codes(values, mapping):
+    """LinkedIn filter codes for the given names, "entry level" and "entry-level" alike"""
+    if isinstance(values, str):
+        values = [values]
+    return ",".join(mapping.get(value.replace(" ", "-"), value) for value in values)
+
 
 def build_linkedin_job_url(
     keywords,
@@ -183,9 +197,9 @@ def build_linkedin_job_url(
     employment_type=None,
     experience_level=None,
     job_type=None,
-    start=10,
+    start=0,
 ):
-    base_url = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search/"
+    base_url = f"{settings.linkedin_base_url}/jobs-guest/jobs/api/seeMoreJobPostings/search/"
 
     # Prepare query parameters
     query_params = {
@@ -196,22 +210,17 @@ def build_linkedin_job_url(
         query_params["location"] = location
 
     if employment_type:
-        if isinstance(employment_type, str):
-            employment_type = [employment_type]
-        employment_type = ",".join(employment_type)
-        query_params["f_WT"] = employment_type
+        query_params["f_JT"] = _filter_codes(employment_type, employment_type_mapping)
 
     if experience_level:
-        if isinstance(experience_level, str):
-            experience_level = [experience_level]
-        experience_level = ",".join(experience_level)
-        query_params["f_E"] = experience_level
+        query_params["f_E"] = _filter_codes(experience_level, experience_type_mapping)
 
     if job_type:
-        if isinstance(job_type, str):
-            job_type = [job_type]
-        job_type = ",".join(job_type)
-        query_params["f_WT"] = job_type
+        query_params["f_WT"] = _filter_codes(job_type, job_type_mapping)
+
+    # Results are paged by card offset
+    if start:
+        query_params["start"] = start
 
     # Build the complete URL
     query_string = urllib.parse.urlencode(query_params)
@@ -234,7 +243,7 @@ def validate_job_search_params(agent_input: Union[str, list], value_dict_mapping
     return agent_input
 
 
-def get_job_ids_from_linkedin_api(
+async def get_job_ids_from_linkedin_api(
     keywords: str,
     location_name: str,
     employment_type=None,
@@ -252,16 +261,17 @@ def get_job_ids_from_linkedin_api(
         experience_level = validate_job_search_params(
             experience, experience_type_mapping
         )
-        api = Linkedin(os.getenv("LINKEDIN_EMAIL"), os.getenv("LINKEDIN_PASS"))
-        job_postings = api.search_jobs(
-            keywords=keywords,
-            job_type=employment_type,
-            location_name=location_name,
-            remote=job_type,
-            limit=limit,
-            experience=experience_level,
-            listed_at=listed_at,
-            distance=distance,
+        job_postings = await linkedin_sessions.run(
+            lambda api: api.search_jobs(
+                keywords=keywords,
+                job_type=employment_type,
+                location_name=location_name,
+                remote=job_type,
+                limit=limit,
+                experience=experience_level,
+                listed_at=listed_at,
+                distance=distance,
+            )
         )
         # Extracting just the part after "jobPosting:" from the trackingUrn and the title using list comprehension
         job_ids = [job["trackingUrn"].split("jobPosting:")[1] for job in job_postings]
@@ -272,7 +282,74 @@ def get_job_ids_from_linkedin_api(
     return []
 
 
-def get_job_ids(
+async def _fetch_search_page(url: str) -> Optional[List[str]]:
+    """Job ids on one search page, None when the page could not be fetched"""
+    try:
+        return parse_job_ids(await linkedin_client.get_text(url, "search"))
+    except LinkedInFetchError as e:
+        print(f"Error in fetching LinkedIn search page -> {e}")
+        return None
+
+
+async def iter_job_ids(
+    keywords: str,
+    location_name: str,
+    employment_type=None,
+    limit: Optional[int] = 10,
+    job_type=None,
+    experience=None,
+) -> AsyncIterator[str]:
+    """Yield up to `limit` unique job ids as search pages arrive, every id on the first
+    linkedin_search_max_pages pages when `limit` is None.
+
+    Pages are requested linkedin_search_concurrency at a time; no further pages are requested
+    after the last one, and the requests still running are cancelled once `limit` ids are in.
+    """
+    max_start = settings.linkedin_search_max_pages * LINKEDIN_PAGE_SIZE
+    pending: Dict[asyncio.Task, int] = {}
+    seen = set()
+    next_start = 0
+    exhausted = False
+
+    def schedule() -> None:
+        nonlocal next_start
+        while not exhausted and len(pending) < settings.linkedin_search_concurrency and next_start < max_start:
+            url = build_linkedin_job_url(
+                keywords=keywords,
+                location=location_name,
+                employment_type=employment_type,
+                experience_level=experience,
+                job_type=job_type,
+                start=next_start,
+            )
+            pending[asyncio.create_task(_fetch_search_page(url))] = next_start
+            next_start += LINKEDIN_PAGE_SIZE
+
+    try:
+        schedule()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=pending.get):
+                del pending[task]
+                page_ids = task.result()
+                if page_ids is None:
+                    continue
+                new_ids = [job_id for job_id in dict.fromkeys(page_ids) if job_id not in seen]
+                if not new_ids:
+                    # An empty page, or one that only repeats earlier cards: the results have run out
+                    exhausted = True
+                for job_id in new_ids:
+                    seen.add(job_id)
+                    yield job_id
+                    if limit is not None and len(seen) >= limit:
+                        return
+            schedule()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def get_job_ids(
     keywords: str,
     location_name: str,
     employment_type: Optional[
@@ -304,9 +381,9 @@ def get_job_ids(
     ] = None,
     listed_at: Optional[Union[int, str]] = 86400,
     distance=None,
-):
+) -> List[str]:
     if os.environ.get("LINKEDIN_SEARCH") == "linkedin_api":
-        return get_job_ids_from_linkedin_api(
+        return await get_job_ids_from_linkedin_api(
             keywords=keywords,
             location_name=location_name,
             employment_type=employment_type,
@@ -317,123 +394,42 @@ def get_job_ids(
             distance=distance,
         )
 
-    try:
-        # Construct the URL for LinkedIn job search
-        job_url = build_linkedin_job_url(
+    return [
+        job_id async for job_id in iter_job_ids(
             keywords=keywords,
-            location=location_name,
+            location_name=location_name,
             employment_type=employment_type,
-            experience_level=experience,
+            limit=limit,
             job_type=job_type,
+            experience=experience,
         )
-
-        # Send a GET request to the URL and store the response
-        response = requests.get(
-            job_url, timeout=30, headers={"User-Agent": "Mozilla/5.0"}
-        )
-
-        # Get the HTML, parse the response and find all list items(jobs postings)
-        list_data = response.text
-        list_soup = BeautifulSoup(list_data, "html.parser")
-        page_jobs = list_soup.find_all("li")
-
-        # Create an empty list to store the job postings
-        job_ids = []
-        # Itetrate through job postings to find job ids
-        for job in page_jobs:
-            base_card_div = job.find("div", {"class": "base-card"})
-            job_id = base_card_div.get("data-entity-urn").split(":")[3]
-            job_ids.append(job_id)
-        return job_ids
-    except Exception as e:
-        print(f"Error in fetching job ids from LinkedIn -> {e}")
-    return []
+    ]
 
 
-async def fetch_job_details(session, job_id):
+async def fetch_job_details(job_id) -> Optional[Dict]:
+    """Details of one posting, None when it could not be fetched even after retries or was not a posting"""
     # Construct the URL for each job using the job ID
-    job_url = f"https://www.linkedin.com/jobs-guest/jobs/api/jobPosting/{job_id}"
-
-    # Send a GET request to the job URL
-    async with session.get(job_url) as response:
-        job_soup = BeautifulSoup(await response.text(), "html.parser")
-
-        # Create a dictionary to store job details
-        job_post = {}
-
-        # Try to extract and store the job title
-        try:
-            job_post["job_title"] = job_soup.find(
-                "h2",
-                {
-                    "class": "top-card-layout__title font-sans text-lg papabear:text-xl font-bold leading-open text-color-text mb-0 topcard__title"
-                },
-            ).text.strip()
-        except Exception as exc:
-            job_post["job_title"] = ""
-
-        try:
-            job_post["job_location"] = job_soup.find(
-                "span",
-                {"class": "topcard__flavor topcard__flavor--bullet"},
-            ).text.strip()
-        except Exception as exc:
-            job_post["job_location"] = ""
-
-        # Try to extract and store the company name
-        try:
-            job_post["company_name"] = job_soup.find(
-                "a", {"class": "topcard__org-name-link topcard__flavor--black-link"}
-            ).text.strip()
-        except Exception as exc:
-            job_post["company_name"] = ""
-
-        # Try to extract and store the time posted
-        try:
-            job_post["time_posted"] = job_soup.find(
-                "span", {"class": "posted-time-ago__text topcard__flavor--metadata"}
-            ).text.strip()
-        except Exception as exc:
-            job_post["time_posted"] = ""
+    job_url = f"{settings.linkedin_base_url}/jobs-guest/jobs/api/jobPosting/{job_id}"
 
-        # Try to extract and store the number of applicants
-        try:
-            job_post["num_applicants"] = job_soup.find(
-                "span",
-                {
-                    "class": "num-applicants__caption topcard__flavor--metadata topcard__flavor--bullet"
-                },
-            ).text.strip()
-        except Exception as exc:
-            job_post["num_applicants"] = ""
-
-        # Try to extract and store the job description
-        try:
-            job_description = job_soup.find(
-                "div", {"class": "decorated-job-posting__details"}
-            ).text.strip()
-            job_post["job_desc_text"] = job_description
-        except Exception as exc:
-            job_post["job_desc_text"] = ""
-
-        try:
-            # Try to extract and store the apply link
-            apply_link_tag = job_soup.find("a", class_="topcard__link")
-            if apply_link_tag:
-                apply_link = apply_link_tag.get("href")
-                job_post["apply_link"] = apply_link
-        except Exception as exc:
-            job_post["apply_link"] = ""
+    started = time.perf_counter()
+    try:
+        html = await linkedin_client.get_text(job_url, "job_posting")
+    except LinkedInFetchError as e:
+        print(f"Error in fetching job details for {job_id} -> {e}")
+        linkedin_client.record_job(time.perf_counter() - started, ok=False)
+        return None
+    linkedin_client.record_job(time.perf_counter() - started, ok=True)
 
-        return job_post
+    loop = asyncio.get_running_loop()
+    job = await loop.run_in_executor(parse_executor, parse_job_posting, html, settings.linkedin_parser)
+    if job is None:
+        print(f"Job posting {job_id} had no job details, skipping it")
+    return job
 
 
 async def get_job_details_from_linkedin_api(job_id):
     try:
-        api = Linkedin(os.getenv("LINKEDIN_EMAIL"), os.getenv("LINKEDIN_PASS"))
-        job_data = await sync_to_async(api.get_job)(
-            job_id
-        )  # Assuming this function is async and fetches job data
+        job_data = await linkedin_sessions.run(lambda api: api.get_job(job_id))
 
         # Construct the job data dictionary with defaults
         job_data_dict = {
@@ -474,25 +470,43 @@ async def get_job_details_from_linkedin_api(job_id):
     return job_data_dict
 
 
-async def fetch_all_jobs(job_ids, batch_size=5):
-    results = []
+async def fetch_all_jobs(job_ids: Union[Iterable[str], AsyncIterable[str]], batch_size=5) -> List[Dict]:
+    """Details for every job id, at most `batch_size` at a time; with an async stream of ids
+    each fetch starts as soon as its id arrives. Postings that could not be fetched or parsed are left out."""
+    if os.environ.get("LINKEDIN_SEARCH") == "linkedin_api":
+        if isinstance(job_ids, AsyncIterable):
+            job_ids = [job_id async for job_id in job_ids]
+        return await asyncio.gather(
+            *[get_job_details_from_linkedin_api(job_id) for job_id in job_ids]
+        )
 
-    try:
-        if os.environ.get("LINKEDIN_SEARCH") == "linkedin_api":
-            return await asyncio.gather(
-                *[get_job_details_from_linkedin_api(job_id) for job_id in job_ids]
-            )
+    semaphore = asyncio.Semaphore(batch_size)
 
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for job_id in job_ids:
-                task = asyncio.create_task(fetch_job_details(session, job_id))
-                tasks.append(task)
+    async def fetch(job_id):
+        async with semaphore:
+            try:
+                return await fetch_job_details(job_id)
+            except Exception as exc:
+                # One posting that fails only loses that posting, not the whole search
+                print(f"Error in fetching job details for {job_id} -> {exc}")
+                return None
 
-            # Await the completion of all tasks
-            results = await asyncio.gather(*tasks)
-            return results
+    tasks = []
+    try:
+        if isinstance(job_ids, AsyncIterable):
+            async for job_id in job_ids:
+                tasks.append(asyncio.create_task(fetch(job_id)))
+        else:
+            tasks = [asyncio.create_task(fetch(job_id)) for job_id in job_ids]
     except Exception as exc:
-        print(f"Error in fetching job details -> {exc}")
+        # Keep the postings already started
+        print(f"Error in collecting job ids -> {exc}")
+
+    # Await the completion of all tasks
+    return [job for job in await asyncio.gather(*tasks) if job is not None]
+
 
-    return results
+async def search_linkedin_jobs(keywords: str, location_name: str, limit: int = 10, **filters) -> List[Dict]:
+    """Collect job ids page by page and fetch each job's details while later pages are still loading"""
+    job_ids = iter_job_ids(keywords=keywords, location_name=location_name, limit=limit, **filters)
+    return await fetch_all_jobs(job_ids, batch_size=settings.linkedin_max_concurrency)
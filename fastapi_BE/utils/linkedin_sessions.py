@@ -0,0 +1,173 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, TypeVar
+from asgiref.sync import sync_to_async
+from linkedin_api import Linkedin
+from linkedin_api.client import UnauthorizedException
+from linkedin_api.cookie_repository import LinkedinSessionExpired
+from requests import HTTPError
+from core.config import settings
+
+T = TypeVar("T")
+
+
+def _is_auth_error(error: Exception) -> bool:
+    """Whether a linkedin_api call failed because the session cookies are no longer accepted"""
+    if isinstance(error, (UnauthorizedException, LinkedinSessionExpired)):
+        return True
+    if isinstance(error, HTTPError) and error.response is not None:
+        return error.response.status_code in (401, 403)
+    # An expired session is redirected to the HTML login page, which the API methods fail to decode
+    return isinstance(error, json.JSONDecodeError)
+
+
+def _cookies_expired(cookies) -> bool:
+    now = time.time()
+    return any(cookie.name == "JSESSIONID" and cookie.expires and cookie.expires <= now for cookie in cookies)
+
+
+class LinkedInSessionPool:
+    """Authenticated linkedin_api clients shared by every call.
+
+    One login provides the cookies, which every client reuses until they expire, get older than
+    `max_age`, or LinkedIn rejects them; then a single fresh login replaces them for all clients.
+    Each client (its requests session is not thread safe) serves one call at a time, and the
+    blocking calls run on a bounded thread pool instead of the loop's default executor.
+    """
+
+    def __init__(self, email: Optional[str], password: Optional[str], size: int, max_age: float):
+        self.email = email
+        self.password = password
+        self.size = size
+        self.max_age = max_age
+        # Created on first use, so the pool can be used again after close()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self._cookies = None
+        self._generation = 0
+        self._logged_in_at = 0.0
+        self._clients: List[Linkedin] = []
+        self._client_generation: Dict[int, int] = {}
+        # Bound to the loop in use, like the HTTP session in utils.linkedin_http
+        self._idle: Optional[asyncio.Queue] = None
+        self._login_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.metrics: Dict[str, float] = {
+            "logins": 0,
+            "refreshes": 0,
+            "calls": 0,
+            "auth_failures": 0,
+            "wait_seconds_total": 0.0,
+        }
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._login_lock = asyncio.Lock()
+        self._idle = asyncio.Queue()
+        for client in self._clients:
+            self._idle.put_nowait(client)
+
+    def _in_thread(self, fn: Callable[..., T]) -> Callable[..., T]:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="linkedin-api")
+        return sync_to_async(fn, thread_sensitive=False, executor=self._executor)
+
+    def _cookies_valid(self) -> bool:
+        return (
+            self._cookies is not None
+            and time.monotonic() - self._logged_in_at < self.max_age
+            and not _cookies_expired(self._cookies)
+        )
+
+    def _login(self, refresh: bool) -> Linkedin:
+        # refresh_cookies skips linkedin_api's on-disk cookie cache, which would hand back the rejected cookies
+        try:
+            return Linkedin(self.email, self.password, refresh_cookies=refresh)
+        except LinkedinSessionExpired:
+            return Linkedin(self.email, self.password, refresh_cookies=True)
+
+    async def _ensure_login(self, stale_generation: Optional[int] = None) -> None:
+        async with self._login_lock:
+            if stale_generation is not None and stale_generation != self._generation:
+                # Another call already logged in again while this one waited
+                return
+            if stale_generation is None and self._cookies_valid():
+                return
+            refresh = self._cookies is not None
+            api = await self._in_thread(self._login)(refresh)
+            self._cookies = api.client.cookies
+            self._logged_in_at = time.monotonic()
+            self._generation += 1
+            self.metrics["refreshes" if refresh else "logins"] += 1
+
+            if len(self._clients) < self.size:
+                self._client_generation[id(api)] = self._generation
+                self._clients.append(api)
+                self._idle.put_nowait(api)
+
+    def _new_client(self) -> Linkedin:
+        # Given the cookies of the shared login, so no authentication request is made
+        return Linkedin(self.email, self.password, cookies=self._cookies.copy())
+
+    async def _acquire(self) -> Linkedin:
+        if self._idle.empty() and len(self._clients) < self.size:
+            client = self._new_client()
+            self._client_generation[id(client)] = self._generation
+            self._clients.append(client)
+            return client
+        return await self._idle.get()
+
+    def _refresh_client(self, client: Linkedin) -> None:
+        if self._client_generation.get(id(client)) != self._generation:
+            client.client._set_session_cookies(self._cookies.copy())
+            self._client_generation[id(client)] = self._generation
+
+    async def run(self, call: Callable[[Linkedin], T]) -> T:
+        """Run `call(client)` on the thread pool with an authenticated client, logging in again
+        and retrying once when the session turns out to have expired"""
+        self._bind()
+        for attempt in range(2):
+            await self._ensure_login()
+            generation = self._generation
+
+            started = time.monotonic()
+            client = await self._acquire()
+            self.metrics["wait_seconds_total"] += time.monotonic() - started
+            self.metrics["calls"] += 1
+            try:
+                self._refresh_client(client)
+                return await self._in_thread(call)(client)
+            except Exception as e:
+                if attempt or not _is_auth_error(e):
+                    raise
+                self.metrics["auth_failures"] += 1
+                await self._ensure_login(stale_generation=generation)
+            finally:
+                self._idle.put_nowait(client)
+
+    def stats(self) -> Dict:
+        return {
+            **self.metrics,
+            "clients": len(self._clients),
+            "session_age_seconds": time.monotonic() - self._logged_in_at if self._cookies is not None else None,
+        }
+
+    def close(self) -> None:
+        """Stop the worker threads; calls still running finish, queued ones are cancelled"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+
+linkedin_sessions = LinkedInSessionPool(
+    email=settings.linkedin_email,
+    password=settings.linkedin_pass,
+    size=settings.linkedin_api_workers,
+    max_age=settings.linkedin_api_session_max_age
+)
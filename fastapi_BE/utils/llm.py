@@ -0,0 +1,90 @@
+import time
+from typing import Any, AsyncIterator, List, Optional
+import httpx
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+from core.config import settings
+from utils.llm_scheduler import llm_scheduler
+from utils.prompt_budget import count_tokens
+from utils.tracing import record_llm_call
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """Connection pool shared by every model client in the process"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_connections
+        ),
+        timeout=settings.llm_timeout
+    )
+
+
+def estimate_tokens(messages: List[BaseMessage], max_tokens: Optional[int] = None) -> int:
+    """Prompt + completion token count for the TPM budget, images are not counted"""
+    prompt_tokens = 0
+    for message in messages:
+        if isinstance(message.content, str):
+            prompt_tokens += count_tokens(message.content)
+        else:
+            for part in message.content:
+                if isinstance(part, str):
+                    prompt_tokens += count_tokens(part)
+                elif isinstance(part, dict) and part.get("type") == "text":
+                    prompt_tokens += count_tokens(part.get("text", ""))
+    return prompt_tokens + (max_tokens or settings.llm_default_completion_tokens)
+
+
+class ScheduledChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose async calls go through the process-wide LLM scheduler"""
+
+    def _budget_tokens(self, messages: List[BaseMessage]) -> int:
+        # Counting tokens means tokenizing the whole prompt, only worth it when a TPM budget is set
+        if llm_scheduler.tokens_per_minute <= 0:
+            return 0
+        return estimate_tokens(messages, self.max_tokens)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        parent = super()._agenerate
+        if self.streaming:
+            # Streaming generation goes through _astream, which is scheduled already
+            return await parent(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+        async def call() -> ChatResult:
+            # Timed per attempt inside the scheduler slot, so queueing and backoff are not counted
+            started = time.perf_counter()
+            result = await parent(messages, stop=stop, run_manager=run_manager, **kwargs)
+            record_llm_call(self.model_name, time.perf_counter() - started, (result.llm_output or {}).get("token_usage"))
+            return result
+
+        return await llm_scheduler.run(call, tokens=self._budget_tokens(messages))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        parent = super()._astream
+        started = time.perf_counter()
+        usage = None
+        async for chunk in llm_scheduler.stream(
+            lambda: parent(messages, stop=stop, run_manager=run_manager, **kwargs),
+            tokens=self._budget_tokens(messages)
+        ):
+            usage = getattr(chunk.message, "usage_metadata", None) or usage
+            yield chunk
+        record_llm_call(self.model_name, time.perf_counter() - started, usage)
+
+
+def build_chat_model(model: str, http_async_client: Optional[httpx.AsyncClient] = None, **kwargs) -> ChatOpenAI:
+    """Create a SambaNova chat model client.
+
+    Retries are left to the scheduler, which backs off for every caller at once on a 429.
+    """
+    kwargs.setdefault("max_retries", 0)
+    return ScheduledChatOpenAI(
+        api_key=settings.sambanova_api_key,
+        base_url=settings.sambanova_base_url,
+        model=model,
+        http_async_client=http_async_client,
+        **kwargs
+    )
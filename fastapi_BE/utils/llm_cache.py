@@ -0,0 +1,89 @@
+import hashlib
+import json
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from langchain_core.messages import AIMessage, BaseMessage, messages_to_dict
+from langchain_openai import ChatOpenAI
+from utils.cache import CacheBackend
+
+
+class LLMResponseCache:
+    """Completions keyed by model, sampling parameters and a digest of the messages.
+
+    Call sites opt in by name; calls from sites that are not enabled, or made while no
+    backend is configured, go straight to the model. Empty completions, and ones the call site's
+    `validate` rejects, are never stored, so a malformed answer is not replayed for the whole TTL.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, enabled_sites: Iterable[str] = (), ttl: Optional[float] = None):
+        self.backend = backend
+        self.enabled_sites = set(enabled_sites)
+        self.ttl = ttl
+        self.site_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0, "rejected": 0})
+
+    def is_enabled(self, site: str) -> bool:
+        return self.backend is not None and site in self.enabled_sites
+
+    @staticmethod
+    def cache_key(model: ChatOpenAI, messages: List[BaseMessage]) -> str:
+        key_source = json.dumps(
+            {
+                "model": model.model_name,
+                "base_url": model.openai_api_base,
+                "temperature": model.temperature,
+                "max_tokens": model.max_tokens,
+                "top_p": model.top_p,
+                "messages": messages_to_dict(messages),
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _is_valid(content: Any, validate: Optional[Callable[[str], Any]]) -> bool:
+        if not isinstance(content, str) or not content.strip():
+            return False
+        if validate is None:
+            return True
+        try:
+            validate(content)
+        except Exception:
+            return False
+        return True
+
+    async def ainvoke(
+        self,
+        model: ChatOpenAI,
+        messages: List[BaseMessage],
+        site: str,
+        validate: Optional[Callable[[str], Any]] = None
+    ) -> BaseMessage:
+        """`validate` runs the call site's parsing on the content and raises when it is unusable"""
+        if not self.is_enabled(site):
+            return await model.ainvoke(messages)
+
+        key = self.cache_key(model, messages)
+        cached_content = self.backend.get(key)
+        if cached_content is not None and self._is_valid(cached_content, validate):
+            self.site_stats[site]["hits"] += 1
+            return AIMessage(content=cached_content)
+
+        self.site_stats[site]["misses"] += 1
+        response = await model.ainvoke(messages)
+        if self._is_valid(response.content, validate):
+            self.backend.set(key, response.content, ttl=self.ttl)
+        else:
+            self.site_stats[site]["rejected"] += 1
+        return response
+
+    def stats(self) -> Dict:
+        sites = {}
+        for site, counts in self.site_stats.items():
+            lookups = counts["hits"] + counts["misses"]
+            sites[site] = {**counts, "hit_rate": counts["hits"] / lookups if lookups else 0.0}
+        return {
+            "enabled_sites": sorted(self.enabled_sites),
+            "sites": sites,
+            "backend": self.backend.stats() if self.backend is not None else {},
+        }
@@ -0,0 +1,239 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+import openai
+from core.config import settings
+from utils.tracing import record_span
+
+T = TypeVar("T")
+
+# Lower runs first; interactive requests jump the queue ahead of long background pipelines
+PRIORITIES = {"interactive": 0, "default": 1, "background": 2}
+
+_current_priority: contextvars.ContextVar[str] = contextvars.ContextVar("llm_priority", default="default")
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """Run every model call made inside the block (and tasks it spawns) with `priority`"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def _retry_after_seconds(error: openai.APIStatusError) -> Optional[float]:
+    """Read Retry-After (seconds or HTTP date) or retry-after-ms from a provider error"""
+    headers = error.response.headers if error.response is not None else {}
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+class LLMScheduler:
+    """Process-wide gate for model calls: a concurrency limit served in priority order,
+    a tokens-per-minute budget, and backoff that respects the provider's Retry-After"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        tokens_per_minute: int = 0,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._active = 0
+        self._waiters: List[tuple] = []
+        self._sequence = itertools.count()
+        self._token_budget = float(tokens_per_minute)
+        self._budget_updated = time.monotonic()
+        self._paused_until = 0.0
+
+        self.metrics: Dict[str, float] = {
+            "calls": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failures": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+        self.wait_by_priority: Dict[str, Dict[str, float]] = {
+            name: {"calls": 0, "wait_seconds_total": 0.0} for name in PRIORITIES
+        }
+
+    async def _acquire(self, priority: int) -> None:
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation landed
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        # Hand the slot straight to the highest priority waiter that is still waiting
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    async def _wait_for_budget(self, tokens: int) -> None:
+        while True:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            if self.tokens_per_minute <= 0:
+                return
+
+            now = time.monotonic()
+            refill_rate = self.tokens_per_minute / 60
+            self._token_budget = min(
+                float(self.tokens_per_minute),
+                self._token_budget + (now - self._budget_updated) * refill_rate
+            )
+            self._budget_updated = now
+            # A single call larger than the whole budget only waits for a full bucket
+            needed = min(tokens, self.tokens_per_minute)
+            if self._token_budget >= needed:
+                self._token_budget -= tokens
+                return
+            await asyncio.sleep((needed - self._token_budget) / refill_rate)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        retry_after = _retry_after_seconds(error) if isinstance(error, openai.APIStatusError) else None
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+            # Everybody waits out a provider-imposed pause, not just the caller that hit it
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        # Jitter so retries from a burst do not land together again
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _enter(self, priority_name: str, tokens: int) -> None:
+        priority = PRIORITIES.get(priority_name, PRIORITIES["default"])
+        started = time.monotonic()
+        await self._acquire(priority)
+        try:
+            await self._wait_for_budget(tokens)
+        except BaseException:
+            self._release()
+            raise
+
+        waited = time.monotonic() - started
+        self.metrics["calls"] += 1
+        self.metrics["wait_seconds_total"] += waited
+        self.metrics["wait_seconds_max"] = max(self.metrics["wait_seconds_max"], waited)
+        by_priority = self.wait_by_priority.setdefault(priority_name, {"calls": 0, "wait_seconds_total": 0.0})
+        by_priority["calls"] += 1
+        by_priority["wait_seconds_total"] += waited
+        record_span("llm_queue", waited)
+
+    async def _handle_error(self, error: Exception, attempt: int) -> None:
+        """Sleep before the next attempt, or re-raise when the error is final"""
+        if isinstance(error, openai.RateLimitError):
+            self.metrics["rate_limited"] += 1
+        if not _is_retryable(error) or attempt >= self.max_retries:
+            self.metrics["failures"] += 1
+            raise error
+        self.metrics["retries"] += 1
+        delay = self._backoff(attempt, error)
+        print(f"Model call failed ({type(error).__name__}), retrying in {delay:.1f}s (attempt {attempt + 1})")
+        await asyncio.sleep(delay)
+
+    async def run(self, call: Callable[[], Awaitable[T]], tokens: int = 0, priority: Optional[str] = None) -> T:
+        priority = priority or _current_priority.get()
+        attempt = 0
+        while True:
+            await self._enter(priority, tokens)
+            try:
+                return await call()
+            except Exception as e:
+                error = e
+            finally:
+                self._release()
+            # Backoff happens without holding a slot so other calls keep flowing
+            await self._handle_error(error, attempt)
+            attempt += 1
+
+    async def stream(self, call: Callable[[], AsyncIterator[T]], tokens: int = 0, priority: Optional[str] = None) -> AsyncIterator[T]:
+        """Like `run` for streamed calls; only retried while nothing has been yielded yet"""
+        priority = priority or _current_priority.get()
+        attempt = 0
+        while True:
+            await self._enter(priority, tokens)
+            yielded = False
+            try:
+                async for item in call():
+                    yielded = True
+                    yield item
+                return
+            except Exception as e:
+                if yielded:
+                    self.metrics["failures"] += 1
+                    raise
+                error = e
+            finally:
+                self._release()
+            await self._handle_error(error, attempt)
+            attempt += 1
+
+    def stats(self) -> Dict:
+        return {
+            **self.metrics,
+            "active": self._active,
+            "queue_depth": sum(1 for _, _, future in self._waiters if not future.done()),
+            "max_concurrency": self.max_concurrency,
+            "token_budget": self._token_budget if self.tokens_per_minute > 0 else None,
+            "paused_for_seconds": max(0.0, self._paused_until - time.monotonic()),
+            "wait_by_priority": self.wait_by_priority,
+        }
+
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.llm_max_concurrency,
+    tokens_per_minute=settings.llm_tokens_per_minute,
+    max_retries=settings.llm_max_retries,
+    backoff_base=settings.llm_backoff_base,
+    backoff_max=settings.llm_backoff_max
+)
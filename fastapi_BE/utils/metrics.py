@@ -0,0 +1,128 @@
+import bisect
+import re
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+# Components register a callable returning their current counters, /metrics collects them all
+_stats_providers: Dict[str, Callable[[], Dict]] = {}
+
+METRIC_PREFIX = "careersensei"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def register_stats(name: str, provider: Callable[[], Dict]) -> None:
+    _stats_providers[name] = provider
+
+
+def collect_stats() -> Dict[str, Dict]:
+    return {name: provider() for name, provider in _stats_providers.items()}
+
+
+def _metric_name(*parts: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", "_".join(parts)).lower()
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], le: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if le:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per combination of label values"""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket..., count in +Inf, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        # First bucket whose upper bound holds the value, len(buckets) is +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        name = f"{METRIC_PREFIX}_{self.name}"
+        lines = [f"# HELP {name} {self.description}", f"# TYPE {name} histogram"]
+        with self._lock:
+            series_items = [(values, list(series)) for values, series in self._series.items()]
+        for values, series in series_items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(self.labels, values, str(bound))} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            lines.append(f"{name}_bucket{_format_labels(self.labels, values, '+Inf')} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(self.labels, values)} {series[-1]}")
+            lines.append(f"{name}_count{_format_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Prometheus-style monotonically increasing counter with labels"""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        name = f"{METRIC_PREFIX}_{self.name}_total"
+        lines = [f"# HELP {name} {self.description}", f"# TYPE {name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        lines.extend(f"{name}{_format_labels(self.labels, values)} {value}" for values, value in items)
+        return lines
+
+
+_instruments: Dict[str, Union[Histogram, Counter]] = {}
+
+
+def histogram(name: str, description: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    if name not in _instruments:
+        _instruments[name] = Histogram(name, description, labels, buckets)
+    return _instruments[name]
+
+
+def counter(name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+    if name not in _instruments:
+        _instruments[name] = Counter(name, description, labels)
+    return _instruments[name]
+
+
+def _flatten(prefix: str, value, lines: List[str]) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}_{key}", item, lines)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        lines.append(f"{METRIC_PREFIX}_{_metric_name(prefix)} {value}")
+
+
+def render_prometheus() -> str:
+    """Histograms and counters, then every numeric value from the registered stats as a gauge"""
+    lines: List[str] = []
+    for instrument in _instruments.values():
+        lines.extend(instrument.render())
+    for name, stats in collect_stats().items():
+        _flatten(name, stats, lines)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,49 @@
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import List
+import PyPDF2
+
+# Kept free of app imports so worker processes only need PyPDF2 to unpickle these functions
+
+
+def extract_pdf_pages(pdf_content: bytes) -> List[str]:
+    """Extract the text of every page of a PDF"""
+    pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_content))
+    return [page.extract_text() or "" for page in pdf_reader.pages]
+
+
+def extract_pdf_text(pdf_content: bytes) -> str:
+    """Extract the text of a whole PDF, page results are joined once at the end"""
+    return "".join(extract_pdf_pages(pdf_content))
+
+
+def _report_worker_pid(pids) -> None:
+    pids.put(os.getpid())
+
+
+class PdfProcessPool(ProcessPoolExecutor):
+    """Process pool whose workers can be killed while they are busy.
+
+    ProcessPoolExecutor cannot stop a running task. Each worker reports its pid when it starts,
+    so a worker stuck on a hostile PDF can be killed without touching the executor's internals.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._worker_pids = multiprocessing.SimpleQueue()
+        super().__init__(max_workers=max_workers, initializer=_report_worker_pid, initargs=(self._worker_pids,))
+
+    def kill(self) -> int:
+        """Shut the pool down and stop its workers, returns how many were stopped"""
+        self.shutdown(wait=False, cancel_futures=True)
+        stopped = 0
+        while not self._worker_pids.empty():
+            try:
+                os.kill(self._worker_pids.get(), signal.SIGTERM)
+                stopped += 1
+            except ProcessLookupError:
+                pass
+        return stopped
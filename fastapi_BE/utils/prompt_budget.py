@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional
+from langchain_core.messages import SystemMessage
+from langchain_openai import ChatOpenAI
+from langchain.text_splitter import TextSplitter
+from core.config import settings
+from utils.cache import TTLCache
+from utils.llm_cache import LLMResponseCache
+
+_ZERO_WIDTH = re.compile(r"[\u200b\u200c\u200d\u2060\ufeff\u00ad]")
+_HORIZONTAL_SPACE = re.compile(r"[^\S\n]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_PAGE_NUMBER = re.compile(r"^page\s*\d+(\s*(/|of)\s*\d+)?$", re.IGNORECASE)
+
+MAP_PROMPT = """Condense the following part of a {kind}. Keep every role, employer, date, skill, technology,
+certification, degree and quantified achievement exactly as written. Drop filler words, repeated content and formatting.
+Return only the condensed text.
+
+{text}
+"""
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # The encoding file is downloaded on first use, which the app makes at startup (load_tokenizer).
+    # The result is cached either way: where the download fails, such as offline deployments, token
+    # counts stay on the len/4 estimate for the life of the process
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(settings.prompt_tokenizer_encoding)
+    except Exception as e:
+        print(f"Tokenizer unavailable, estimating tokens from characters -> {e}")
+        return None
+
+
+def load_tokenizer() -> bool:
+    """Load the encoding ahead of the first count, it may be downloaded. Blocking, run it in a thread"""
+    return _encoding() is not None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return encoding.decode(tokens[:max_tokens]) if len(tokens) > max_tokens else text
+
+
+def compact_text(text: str, dedupe_min_chars: Optional[int] = None) -> str:
+    """Strip extraction noise: odd whitespace, "Page N" footers and lines repeated on every page.
+
+    Lines shorter than `dedupe_min_chars` are only dropped when they repeat back to back,
+    so short values such as "Remote" that legitimately recur are kept.
+    """
+    dedupe_min_chars = settings.prompt_dedupe_min_chars if dedupe_min_chars is None else dedupe_min_chars
+    text = _ZERO_WIDTH.sub("", unicodedata.normalize("NFKC", text))
+
+    seen = set()
+    lines: List[str] = []
+    previous = None
+    for raw_line in text.splitlines():
+        line = _HORIZONTAL_SPACE.sub(" ", raw_line).strip()
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            previous = None
+            continue
+        if _PAGE_NUMBER.match(line):
+            continue
+        key = line.casefold()
+        if key == previous or (len(line) >= dedupe_min_chars and key in seen):
+            continue
+        seen.add(key)
+        previous = key
+        lines.append(line)
+
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+class PromptCompactor:
+    """Fit documents into a per-call token budget before they are pasted into a prompt.
+
+    Text is compacted first; if it is still over budget it is summarized chunk by chunk
+    (map) and the joined summaries are condensed again (reduce) until it fits, then
+    truncated as a last resort. Results are memoized so call sites sharing a document
+    pay for the summarization once.
+    """
+
+    def __init__(self, model: ChatOpenAI, text_splitter: TextSplitter, llm_cache: Optional[LLMResponseCache] = None):
+        self.model = model
+        self.text_splitter = text_splitter
+        self.llm_cache = llm_cache or LLMResponseCache()
+        self._results = TTLCache(maxsize=256, ttl=settings.llm_cache_ttl)
+        self.site_stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "tokens_before": 0, "tokens_after": 0, "map_reduced": 0, "truncated": 0}
+        )
+
+    async def _map_reduce(self, text: str, kind: str, budget: int) -> str:
+        for _ in range(settings.prompt_max_reduce_rounds):
+            chunks = self.text_splitter.split_text(text)
+            responses = await asyncio.gather(*(
+                self.llm_cache.ainvoke(
+                    self.model,
+                    [SystemMessage(content=MAP_PROMPT.format(kind=kind, text=chunk))],
+                    site="prompt_budget.summarize"
+                )
+                for chunk in chunks
+            ))
+            text = compact_text("\n".join(response.content.strip() for response in responses))
+            if count_tokens(text) <= budget or len(chunks) == 1:
+                break
+        return text
+
+    async def compact(self, text: str, site: str, budget: int, kind: str = "resume") -> str:
+        """Return `text` fitted into `budget` tokens, recording before/after token counts for `site`"""
+        key = hashlib.sha256(f"{budget}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+        entry = self._results.get(key)
+        if entry is None:
+            tokens_before = count_tokens(text)
+            compacted = compact_text(text)
+            map_reduced = truncated = False
+            if count_tokens(compacted) > budget:
+                try:
+                    compacted = await self._map_reduce(compacted, kind, budget)
+                    map_reduced = True
+                except Exception as e:
+                    print(f"Summarizing {kind} for {site} failed, truncating instead -> {e}")
+            if count_tokens(compacted) > budget:
+                compacted = truncate_to_tokens(compacted, budget)
+                truncated = True
+            entry = (compacted, tokens_before, count_tokens(compacted), map_reduced, truncated)
+            self._results.set(key, entry)
+
+        compacted, tokens_before, tokens_after, map_reduced, truncated = entry
+        stats = self.site_stats[site]
+        stats["calls"] += 1
+        stats["tokens_before"] += tokens_before
+        stats["tokens_after"] += tokens_after
+        stats["map_reduced"] += map_reduced
+        stats["truncated"] += truncated
+        print(f"Prompt {site}: {kind} {tokens_before} -> {tokens_after} tokens")
+        return compacted
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            site: {
+                **counts,
+                "saved_ratio": 1 - counts["tokens_after"] / counts["tokens_before"] if counts["tokens_before"] else 0.0,
+            }
+            for site, counts in self.site_stats.items()
+        }
@@ -0,0 +1,123 @@
+from typing import Optional
+from fastapi import Request
+from langchain_community.utilities import tavily_search
+from core.config import settings
+from utils.agent_deadline import agent_run_stats
+from db.db import engine
+from utils.cache import build_cache
+from utils.image_preprocessing import preprocessing_stats
+from utils.job_store import JobPostingStore
+from utils.linkedin_http import linkedin_client
+from utils.linkedin_sessions import linkedin_sessions
+from utils.llm import build_http_client
+from utils.llm_cache import LLMResponseCache
+from utils.llm_scheduler import llm_scheduler
+from utils.metrics import register_stats
+from utils.pdf_extraction import PdfProcessPool
+from utils.search_cache import CachedTavilySearchResults
+from utils.single_flight import SingleFlight
+from utils.text_cache import build_text_cache
+from utils.resume_jobs import ResumeProcessor
+from utils.filters_jobs import JobSearchProcessor
+from utils.resume_score import ResumeScorer, scoring_stats
+from utils.cover_letter import CoverLetterGenerator
+
+
+def build_search_tool(single_flight: Optional[SingleFlight] = None) -> CachedTavilySearchResults:
+    if settings.tavily_api_url:
+        # The Tavily wrapper reads its endpoint from a module constant, there is no per-instance option
+        tavily_search.TAVILY_API_URL = settings.tavily_api_url.rstrip("/")
+    return CachedTavilySearchResults(
+        cache=build_cache(
+            settings.search_cache_backend,
+            maxsize=settings.search_cache_max_entries,
+            ttl=settings.search_cache_ttl,
+            directory=settings.search_cache_dir
+        ),
+        cache_ttl=settings.search_cache_ttl,
+        single_flight=single_flight
+    )
+
+
+class ProcessorRegistry:
+    """LLM pipeline components built once per process and shared by every request"""
+
+    def __init__(self):
+        # One connection pool and one search tool for every model client and agent
+        self.http_client = build_http_client()
+        # Identical requests already in flight share one pipeline run
+        self.single_flight = SingleFlight()
+        register_stats("single_flight", self.single_flight.stats)
+        self.search_tool = build_search_tool(self.single_flight)
+        register_stats("search_cache", self.search_tool.stats)
+        self.text_cache = build_text_cache()
+        register_stats("extracted_text_cache", self.text_cache.stats)
+        register_stats("vision_image_preprocessing", lambda: dict(preprocessing_stats))
+        register_stats("resume_scoring", lambda: {mode: dict(stats) for mode, stats in scoring_stats.items()})
+        self.analysis_cache = build_cache(
+            settings.analysis_cache_backend,
+            maxsize=settings.analysis_cache_max_entries,
+            ttl=settings.analysis_cache_ttl,
+            directory=settings.analysis_cache_dir
+        )
+        if self.analysis_cache is not None:
+            register_stats("resume_analysis_cache", self.analysis_cache.stats)
+        self.llm_cache = LLMResponseCache(
+            build_cache(
+                settings.llm_cache_backend,
+                maxsize=settings.llm_cache_max_entries,
+                ttl=settings.llm_cache_ttl,
+                directory=settings.llm_cache_dir
+            ),
+            enabled_sites=[site.strip() for site in settings.llm_cache_sites.split(",") if site.strip()],
+            ttl=settings.llm_cache_ttl
+        )
+        register_stats("llm_response_cache", self.llm_cache.stats)
+        register_stats("llm_scheduler", llm_scheduler.stats)
+        register_stats("linkedin_http", linkedin_client.stats)
+        register_stats("linkedin_api_sessions", linkedin_sessions.stats)
+        self.pdf_executor = PdfProcessPool(settings.pdf_workers) if settings.pdf_workers > 0 else None
+
+        # Jobs found by any search or saved by any user, filter searches are answered from it first
+        self.job_store = JobPostingStore(engine, max_age=settings.job_store_max_age) if settings.job_store_enabled else None
+        if self.job_store is not None:
+            register_stats("job_store", self.job_store.stats)
+
+        self.resume_processor = ResumeProcessor(
+            http_async_client=self.http_client,
+            search_tool=self.search_tool,
+            text_cache=self.text_cache,
+            pdf_executor=self.pdf_executor,
+            analysis_cache=self.analysis_cache,
+            llm_cache=self.llm_cache,
+            job_store=self.job_store
+        )
+        self.job_search_processor = JobSearchProcessor(
+            http_async_client=self.http_client,
+            search_tool=self.search_tool,
+            job_store=self.job_store
+        )
+        register_stats("prompt_compaction", self.resume_processor.compactor.stats)
+        register_stats("agent_runs", agent_run_stats)
+        self.resume_scorer = ResumeScorer(
+            self.resume_processor,
+            http_async_client=self.http_client,
+            llm_cache=self.llm_cache
+        )
+        self.cover_letter_generator = CoverLetterGenerator(
+            self.resume_processor,
+            http_async_client=self.http_client,
+            llm_cache=self.llm_cache
+        )
+
+    async def aclose(self):
+        await self.http_client.aclose()
+        await linkedin_client.aclose()
+        linkedin_sessions.close()
+        # The resume processor replaces its pool when a PDF times out, so shut down the one it holds now
+        if self.resume_processor.pdf_executor is not None:
+            self.resume_processor.pdf_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_registry(request: Request) -> ProcessorRegistry:
+    return request.app.state.registry
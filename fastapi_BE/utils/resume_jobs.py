@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Union
 from fastapi import HTTPException, File, UploadFile
 from fastapi.responses import JSONResponse
 import traceback
@@ -9,17 +9,34 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 import json
 import base64
+import asyncio
+import hashlib
+import time
+import httpx
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # LangChain imports
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
-from langchain.agents import create_openai_functions_agent, AgentExecutor
+from langchain.agents import create_openai_functions_agent
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores.faiss import FAISS
 from langchain.output_parsers import PydanticOutputParser
 from core.config import settings
+from utils.agent_deadline import DeadlineAgentExecutor, agent_deadline
+from utils.cache import CacheBackend
+from utils.image_preprocessing import prepare_vision_image, record_preprocessing
+from utils.job_store import JobPostingStore
+from utils.job_match_stream import JobMatchStreamParser, partial_matches_output
+from utils.llm import build_chat_model
+from utils.llm_cache import LLMResponseCache
+from utils.pdf_extraction import PdfProcessPool, extract_pdf_text
+from utils.prompt_budget import PromptCompactor
+from utils.text_cache import content_digest
+from utils.tracing import agent_callbacks, span
 
 # Load environment variables
 load_dotenv()
@@ -40,37 +57,102 @@ class JobMatch(BaseModel):
 class JobMatchesResponse(BaseModel):
     matches: List[JobMatch] = Field(description="List of matching job opportunities")
     search_summary: Optional[str] = Field(description="Summary of the job search results", default=None)
+    partial: bool = Field(description="True when the search stopped at its deadline", default=False)
+
+# Bump whenever the analysis prompt changes, so cached analyses from the old prompt are not reused
+ANALYSIS_PROMPT_VERSION = "1"
+
+ANALYSIS_PROMPT = """Analyze the following resume and extract key information including:
+            1. Professional summary
+            2. Key skills and technologies
+            3. Years of experience
+            4. Current/most recent role
+            5. Industry focus
+
+            Resume content:
+            {text_content}
+            """
+
+
+def normalize_resume_text(text_content: str) -> str:
+    """Collapse whitespace so re-extractions of the same resume hash identically"""
+    return "\n".join(" ".join(line.split()) for line in text_content.splitlines() if line.strip())
+
 
 class ResumeProcessor:
-    def __init__(self):
-        self.model = ChatOpenAI(
-            api_key=settings.sambanova_api_key,
-            base_url="https://api.sambanova.ai/v1",
-            model="Meta-Llama-3.1-70B-Instruct",
+    def __init__(
+        self,
+        http_async_client: Optional[httpx.AsyncClient] = None,
+        search_tool: Optional[TavilySearchResults] = None,
+        text_cache: Optional[CacheBackend] = None,
+        pdf_executor: Optional[Executor] = None,
+        analysis_cache: Optional[CacheBackend] = None,
+        llm_cache: Optional[LLMResponseCache] = None,
+        job_store: Optional[JobPostingStore] = None
+    ):
+        self.text_cache = text_cache
+        self.job_store = job_store
+        self.analysis_cache = analysis_cache
+        self.llm_cache = llm_cache or LLMResponseCache()
+        self.pdf_executor = pdf_executor
+        self.model = build_chat_model(
+            "Meta-Llama-3.1-70B-Instruct",
+            http_async_client=http_async_client,
             temperature=0.7
         )
-        self.vision_model = ChatOpenAI(
-            api_key=settings.sambanova_api_key,
-            base_url="https://api.sambanova.ai/v1",
-            model="Llama-3.2-90B-Vision-Instruct",
+        self.vision_model = build_chat_model(
+            "Llama-3.2-90B-Vision-Instruct",
+            http_async_client=http_async_client,
             max_tokens=1000
         )
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=100
+            chunk_size=settings.prompt_chunk_chars,
+            chunk_overlap=200
+        )
+        # Shared with the scorer and cover letter generator, which paste the same documents into their prompts
+        self.compactor = PromptCompactor(
+            build_chat_model(settings.prompt_summary_model, http_async_client=http_async_client, temperature=0),
+            self.text_splitter,
+            self.llm_cache
         )
         self.output_parser = PydanticOutputParser(pydantic_object=JobMatchesResponse)
-        self.setup_agent()
+        self.setup_agent(search_tool)
 
-    def _process_image_bytes(self, image_bytes: bytes) -> str:
+    def _process_image_bytes(self, image_bytes: Union[bytes, memoryview]) -> str:
         """Process image from bytes and convert to base64."""
         return base64.b64encode(image_bytes).decode('utf-8')
 
-    async def extract_text_from_image(self, image_bytes: bytes) -> str:
+    def _cached_text(self, kind: str, digest: str) -> Optional[str]:
+        if self.text_cache is None:
+            return None
+        return self.text_cache.get(f"{kind}-{digest}")
+
+    def _store_text(self, kind: str, digest: str, text: str) -> None:
+        if self.text_cache is not None:
+            self.text_cache.set(f"{kind}-{digest}", text)
+
+    async def extract_text_from_image(self, image_bytes: Union[bytes, memoryview], digest: Optional[str] = None) -> str:
         """Extract text from image using vision model."""
+        digest = digest or content_digest(image_bytes)
+        cached_text = self._cached_text("image", digest)
+        if cached_text is not None:
+            return cached_text
+
         try:
+            # Shrink the image to what the model actually looks at, off the event loop
+            try:
+                with span("image_preprocess"):
+                    prepared = await asyncio.to_thread(
+                        prepare_vision_image,
+                        image_bytes,
+                        settings.vision_max_side,
+                        settings.vision_jpeg_quality
+                    )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
             # Process image bytes to base64
-            image_data = self._process_image_bytes(image_bytes)
+            image_data = self._process_image_bytes(prepared.content)
 
             # Create message with image
             message = HumanMessage(
@@ -82,7 +164,7 @@ class ResumeProcessor:
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_data}",
+                            "url": f"data:{prepared.mime_type};base64,{image_data}",
                             "detail": "high"
                         }
                     }
@@ -90,16 +172,21 @@ class ResumeProcessor:
             )
 
             # Get response from vision model
+            started = time.perf_counter()
             response = await self.vision_model.ainvoke([message])
+            record_preprocessing(prepared, time.perf_counter() - started)
+            self._store_text("image", digest, response.content)
             return response.content
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error analyzing image: {str(e)}")
 
-    def setup_agent(self):
+    def setup_agent(self, search_tool: Optional[TavilySearchResults] = None):
         """Set up the LangChain agent with necessary tools and prompts"""
         # Create tools
-        self.search_tool = TavilySearchResults()
+        self.search_tool = search_tool or TavilySearchResults()
         
         # Define the system message without format instructions in the template
         system_message = """You are an expert job search assistant. Your task is to search for relevant job opportunities based on 
@@ -136,43 +223,88 @@ class ResumeProcessor:
             tools=[self.search_tool]
         )
 
-        self.agent_executor = AgentExecutor(
+        self.agent_executor = DeadlineAgentExecutor(
             agent=self.agent,
             tools=[self.search_tool],
-            verbose=True
+            partial_output=partial_matches_output,
+            verbose=False
         )
 
-    async def extract_text_from_pdf(self, pdf_content: bytes) -> str:
+    async def _extract_pdf_in_pool(self, pdf_content: Union[bytes, memoryview]) -> str:
+        """Parse off the event loop; a worker still busy at the timeout is killed along with its pool"""
+        executor = self.pdf_executor
+        future = asyncio.get_running_loop().run_in_executor(executor, extract_pdf_text, pdf_content)
+        try:
+            return await asyncio.wait_for(future, timeout=settings.pdf_extraction_timeout)
+        except asyncio.TimeoutError:
+            if isinstance(executor, PdfProcessPool):
+                self._recycle_pdf_executor(executor)
+            raise
+
+    def _recycle_pdf_executor(self, executor: PdfProcessPool) -> None:
+        """Replace a pool whose worker is stuck on a hostile PDF, so repeated uploads cannot exhaust it"""
+        if self.pdf_executor is not executor:
+            # Another timed out extraction already replaced it
+            return
+        self.pdf_executor = PdfProcessPool(settings.pdf_workers)
+        stopped = executor.kill()
+        print(f"PDF extraction timed out, replaced the process pool (worker processes stopped: {stopped})")
+
+    async def extract_text_from_pdf(self, pdf_content: Union[bytes, memoryview], digest: Optional[str] = None) -> str:
         """Extract text content from PDF bytes"""
+        digest = digest or content_digest(pdf_content)
+        cached_text = self._cached_text("pdf", digest)
+        if cached_text is not None:
+            return cached_text
+
         try:
-            pdf_file = BytesIO(pdf_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text_content = ""
-            for page in pdf_reader.pages:
-                text_content += page.extract_text()
-            
+            if isinstance(self.pdf_executor, ProcessPoolExecutor) and isinstance(pdf_content, memoryview):
+                # Views cannot be pickled, worker processes get the one copy they need
+                pdf_content = bytes(pdf_content)
+            with span("pdf_extract"):
+                try:
+                    text_content = await self._extract_pdf_in_pool(pdf_content)
+                except BrokenProcessPool:
+                    # The pool was recycled under this extraction because another PDF timed out
+                    text_content = await self._extract_pdf_in_pool(pdf_content)
+
+            self._store_text("pdf", digest, text_content)
             return text_content
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Timed out extracting PDF content")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error extracting PDF content: {str(e)}")
 
+    async def extract_text(self, content: Union[bytes, memoryview], file_type: str, digest: Optional[str] = None) -> str:
+        """Extract text from an uploaded pdf or image"""
+        if file_type == "pdf":
+            return await self.extract_text_from_pdf(content, digest=digest)
+        return await self.extract_text_from_image(content, digest=digest)
+
+    def _analysis_cache_key(self, text_content: str) -> str:
+        key_source = "\0".join([ANALYSIS_PROMPT_VERSION, self.model.model_name, normalize_resume_text(text_content)])
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
     async def analyze_resume(self, text_content: str) -> str:
         """Analyze resume content using LLM to extract key information"""
-        try:
-            analysis_prompt = """Analyze the following resume and extract key information including:
-            1. Professional summary
-            2. Key skills and technologies
-            3. Years of experience
-            4. Current/most recent role
-            5. Industry focus
+        cache_key = None
+        if self.analysis_cache is not None:
+            cache_key = self._analysis_cache_key(text_content)
+            cached_analysis = self.analysis_cache.get(cache_key)
+            if cached_analysis is not None:
+                return cached_analysis
 
-            Resume content:
-            {text_content}
-            """
-            
-            response = await self.model.ainvoke(
-                [SystemMessage(content=analysis_prompt.format(text_content=text_content))]
+        try:
+            prompt_text = await self.compactor.compact(
+                text_content, "resume_jobs.analyze_resume", settings.resume_prompt_token_budget
             )
+            response = await self.llm_cache.ainvoke(
+                self.model,
+                [SystemMessage(content=ANALYSIS_PROMPT.format(text_content=prompt_text))],
+                site="resume_jobs.analyze_resume"
+            )
+            if cache_key is not None:
+                self.analysis_cache.set(cache_key, response.content)
             return response.content
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error analyzing resume: {str(e)}")
@@ -193,55 +325,32 @@ class ResumeProcessor:
             ]
 
             # Get response from agent
-            response = await self.agent_executor.ainvoke({
-                "input": messages[0].content,
-                "chat_history": messages
-            })
+            with span("agent"), agent_deadline(settings.agent_deadline_seconds):
+                response = await self.agent_executor.ainvoke(
+                    {"input": messages[0].content, "chat_history": messages},
+                    config={"callbacks": agent_callbacks()}
+                )
 
-            # Try to parse the response as JSON
-            try:
-                # First, try to extract JSON from the text if it's not already JSON
-                response_text = response["output"]
+            # Parse the response in one pass, keeping every valid match even if the tail is malformed
+            parser = JobMatchStreamParser(JobMatch, JobMatchesResponse)
+            parser.feed(response["output"])
+            job_matches = parser.response(response["output"], response.get("partial", False))
+
+            # Matches found for a resume can answer later filter searches too
+            if self.job_store is not None and job_matches.matches:
                 try:
-                    # Try to parse directly first
-                    json_data = json.loads(response_text)
-                except json.JSONDecodeError:
-                    # If direct parsing fails, try to find JSON-like structure in the text
-                    import re
-                    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                    if json_match:
-                        json_data = json.loads(json_match.group())
-                    else:
-                        raise ValueError("No JSON structure found in response")
-
-                # Parse the JSON data into our Pydantic model
-                parsed_response = JobMatchesResponse(**json_data)
-                return parsed_response
-
-            except Exception as parsing_error:
-                print(f"Error parsing response: {parsing_error}")
-                print(f"Raw response: {response['output']}")
-                # Fallback handling if parsing fails
-                return JobMatchesResponse(
-                    matches=[],
-                    search_summary=f"Error parsing job matches. Raw response: {response['output']}"
-                )
+                    await asyncio.to_thread(self.job_store.record, [match.dict() for match in job_matches.matches], "resume_search")
+                except Exception as e:
+                    print(f"Error recording job postings -> {e}")
+            return job_matches
 
         except Exception as e:
             traceback.print_exc()
             raise HTTPException(status_code=500, detail=f"Error searching jobs: {str(e)}")
 
-async def process_resume(file_content: bytes, file_type: str) -> Dict:
-    """Process resume content and return analysis and job matches"""
+async def process_resume(text_content: str, processor: ResumeProcessor) -> Dict:
+    """Process extracted resume text and return analysis and job matches"""
     try:
-        processor = ResumeProcessor()
-        
-        # Extract text based on file type
-        if file_type == "pdf":
-            text_content = await processor.extract_text_from_pdf(file_content)
-        else:  # image
-            text_content = await processor.extract_text_from_image(file_content)
-        
         # Analyze the extracted text
         resume_analysis = await processor.analyze_resume(text_content)
         
@@ -1,24 +1,124 @@
+import time
 import traceback
-from typing import Dict, Tuple
+from typing import Dict, List, Literal, Optional, Tuple, Union
 from fastapi import HTTPException
-from langchain_openai import ChatOpenAI
+import httpx
+from pydantic import BaseModel, field_validator
 from langchain_core.messages import SystemMessage
 from core.config import settings
+from utils.llm import build_chat_model
+from utils.llm_cache import LLMResponseCache
 from utils.resume_jobs import ResumeProcessor
 import json
 
+SCORE_COMPONENTS = [
+    "Professional Experience",
+    "Skills & Technologies",
+    "Education & Certifications",
+    "Resume Format",
+    "Overall Impact",
+]
+
+# Latency per scoring mode, exposed on /metrics. Single-call runs that fell back to three calls
+# have their own bucket, so neither mode's figures include the other's latency
+scoring_stats: Dict[str, Dict[str, float]] = {
+    mode: {"requests": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+    for mode in ("single", "multi", "fallback")
+}
+
+
+class ResumeScoreResult(BaseModel):
+    domain: str
+    component_scores: Dict[str, float]
+    improvement_advice: Union[str, List[str]]
+
+    @field_validator("domain")
+    @classmethod
+    def check_domain(cls, v):
+        if not v.strip():
+            raise ValueError("domain is empty")
+        return v.strip()
+
+    @field_validator("component_scores")
+    @classmethod
+    def check_scores(cls, v):
+        if set(v) != set(SCORE_COMPONENTS):
+            raise ValueError(f"Expected exactly these components: {SCORE_COMPONENTS}")
+        for key, value in v.items():
+            if value < 0 or value > 20:
+                raise ValueError(f"Invalid score for {key}: {value}")
+        return v
+
+    @field_validator("improvement_advice")
+    @classmethod
+    def check_advice(cls, v):
+        if isinstance(v, list):
+            v = "\n".join(f"- {item.lstrip('-• ').strip()}" for item in v if item.strip())
+        if not v.strip():
+            raise ValueError("improvement_advice is empty")
+        return v.strip()
+
+
+def parse_json_object(text: str) -> Dict:
+    """Parse a JSON object from model output, tolerating text around it"""
+    try:
+        return json.loads(text.strip())
+    except json.JSONDecodeError:
+        # If direct parsing fails, try to find JSON-like structure in the text
+        import re
+        json_match = re.search(r'\{.*\}', text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+        raise ValueError("No JSON structure found in response")
+
+
+def parse_scores(text: str) -> Dict:
+    """Component scores from the calculate_score answer, raising when one is missing its number or out of range"""
+    scores = parse_json_object(text)
+    for key, value in scores.items():
+        if not isinstance(value, (int, float)) or value < 0 or value > 20:
+            raise ValueError(f"Invalid score for {key}: {value}")
+    return scores
+
+
+def parse_score_result(text: str) -> ResumeScoreResult:
+    return ResumeScoreResult(**parse_json_object(text))
+
+
+def record_scoring(mode: Literal["single", "multi", "fallback"], elapsed: float) -> None:
+    stats = scoring_stats[mode]
+    stats["requests"] += 1
+    stats["total_seconds"] += elapsed
+    stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+    if mode == "fallback":
+        print(f"Resume scored in multi mode after single mode failed, in {elapsed:.2f}s")
+    else:
+        print(f"Resume scored in {mode} mode in {elapsed:.2f}s")
+
+
 class ResumeScorer:
-    def __init__(self):
-        self.model = ChatOpenAI(
-            api_key=settings.sambanova_api_key,
-            base_url="https://api.sambanova.ai/v1",
-            model="Meta-Llama-3.1-70B-Instruct",
+    def __init__(
+        self,
+        resume_processor: ResumeProcessor,
+        http_async_client: Optional[httpx.AsyncClient] = None,
+        llm_cache: Optional[LLMResponseCache] = None
+    ):
+        self.llm_cache = llm_cache or LLMResponseCache()
+        self.model = build_chat_model(
+            "Meta-Llama-3.1-70B-Instruct",
+            http_async_client=http_async_client,
             temperature=0.3
         )
-        self.resume_processor = ResumeProcessor()
+        # Shared processor, used for text extraction and prompt compaction
+        self.resume_processor = resume_processor
+
+    async def _prompt_text(self, resume_text: str, site: str) -> str:
+        """Resume text fitted into the prompt token budget"""
+        return await self.resume_processor.compactor.compact(resume_text, site, settings.resume_prompt_token_budget)
 
     async def detect_domain(self, resume_text: str) -> str:
         """Detect the professional domain from resume text"""
+        resume_text = await self._prompt_text(resume_text, "resume_score.detect_domain")
         prompt = f"""Analyze the following resume and determine the primary professional domain 
         (e.g., Software Engineering, Data Science, Marketing, etc.):
         
@@ -26,11 +126,12 @@ class ResumeScorer:
         
         Return only the domain name, nothing else."""
         
-        response = await self.model.ainvoke([SystemMessage(content=prompt)])
+        response = await self.llm_cache.ainvoke(self.model, [SystemMessage(content=prompt)], site="resume_score.detect_domain")
         return response.content.strip()
 
     async def generate_advice(self, resume_text: str, domain: str, component_scores: Dict) -> str:
         """Generate personalized advice based on resume content, domain and scores"""
+        resume_text = await self._prompt_text(resume_text, "resume_score.generate_advice")
         advice_prompt = f"""Analyze this {domain} resume and provide specific improvement recommendations.
 
         Resume Text:
@@ -47,15 +148,16 @@ class ResumeScorer:
         
         Return only a bullet-point list of recommendations, no other text."""
         
-        response = await self.model.ainvoke([SystemMessage(content=advice_prompt)])
+        response = await self.llm_cache.ainvoke(self.model, [SystemMessage(content=advice_prompt)], site="resume_score.generate_advice")
         return response.content.strip()
 
     async def calculate_score(self, resume_text: str, domain: str) -> Tuple[int, Dict, str]:
         """Calculate resume score based on various components"""
+        prompt_text = await self._prompt_text(resume_text, "resume_score.calculate_score")
         scoring_prompt = f"""Analyze this {domain} resume and score each component:
         
         Resume Text:
-        {resume_text}
+        {prompt_text}
         
         Score these components (0-20 points each):
         1. Professional Experience (relevance, clarity, achievements)
@@ -73,27 +175,13 @@ class ResumeScorer:
         """
         
         try:
-            response = await self.model.ainvoke([SystemMessage(content=scoring_prompt)])
-            # Clean the response string and parse JSON
-            try:
-                json_str = response.content.strip()
-                scores = json.loads(json_str)
-            except json.JSONDecodeError:
-                # If direct parsing fails, try to find JSON-like structure in the text
-                import re
-                json_match = re.search(r'\{.*\}', response.content, re.DOTALL)
-                if json_match:
-                    scores = json.loads(json_match.group())
-                else:
-                    raise ValueError("No JSON structure found in response")
+            response = await self.llm_cache.ainvoke(
+                self.model, [SystemMessage(content=scoring_prompt)], site="resume_score.calculate_score", validate=parse_scores
+            )
+            scores = parse_scores(response.content)
             
             print(f"JSON STR: {scores}")
             
-            # Validate scores
-            for key, value in scores.items():
-                if not isinstance(value, (int, float)) or value < 0 or value > 20:
-                    raise ValueError(f"Invalid score for {key}: {value}")
-            
             total_score = sum(scores.values())
             # Generate advice based on full resume analysis
             advice = await self.generate_advice(resume_text, domain, scores)
@@ -103,32 +191,93 @@ class ResumeScorer:
             print(f"Traceback error: {traceback.print_exc()}")
             raise HTTPException(status_code=500, detail=f"Error calculating scores: {str(e)}")
 
+    async def score_in_single_call(self, resume_text: str) -> ResumeScoreResult:
+        """Detect the domain, score every component and write advice in one structured call"""
+        resume_text = await self._prompt_text(resume_text, "resume_score.single_call")
+        components = ",\n".join(f'                "{component}": score' for component in SCORE_COMPONENTS)
+        prompt = f"""Analyze the following resume.
+
+        Resume Text:
+        {resume_text}
+
+        1. Determine the primary professional domain (e.g., Software Engineering, Data Science, Marketing, etc.).
+        2. Score these components for that domain (0-20 points each):
+           - Professional Experience (relevance, clarity, achievements)
+           - Skills & Technologies (relevance to the domain, breadth, depth)
+           - Education & Certifications
+           - Resume Format & Organization
+           - Overall Impact & Effectiveness
+        3. Provide 4-5 specific, actionable improvement recommendations, including domain-specific advice
+           and focusing especially on components that scored below 15 points.
+
+        Only return a JSON object with exactly this shape and no other text:
+        {{
+            "domain": "domain name",
+            "component_scores": {{
+{components}
+            }},
+            "improvement_advice": ["recommendation", "..."]
+        }}
+        """
+
+        response = await self.llm_cache.ainvoke(
+            self.model, [SystemMessage(content=prompt)], site="resume_score.single_call", validate=parse_score_result
+        )
+        return parse_score_result(response.content)
+
+    async def score_in_three_calls(self, resume_text: str) -> Tuple[str, float, Dict, str]:
+        """Detect the domain, then score, then generate advice"""
+        domain = await self.detect_domain(resume_text)
+        total_score, component_scores, advice = await self.calculate_score(resume_text, domain)
+        return domain, total_score, component_scores, advice
+
+    async def score(self, resume_text: str, scoring_mode: Optional[str] = None) -> Dict:
+        """Score a resume with the requested engine, "single" falls back to "multi" on invalid output"""
+        scoring_mode = scoring_mode or settings.resume_scoring_mode
+        started = time.perf_counter()
+
+        if scoring_mode == "single":
+            try:
+                result = await self.score_in_single_call(resume_text)
+                record_scoring("single", time.perf_counter() - started)
+                return {
+                    "domain": result.domain,
+                    "total_score": sum(result.component_scores.values()),
+                    "component_scores": result.component_scores,
+                    "improvement_advice": result.improvement_advice,
+                    "scoring_mode": "single"
+                }
+            except Exception as e:
+                print(f"Single-call scoring failed, falling back to three calls -> {e}")
+
+        domain, total_score, component_scores, advice = await self.score_in_three_calls(resume_text)
+        record_scoring("fallback" if scoring_mode == "single" else "multi", time.perf_counter() - started)
+        return {
+            "domain": domain,
+            "total_score": total_score,
+            "component_scores": component_scores,
+            "improvement_advice": advice,
+            "scoring_mode": "multi"
+        }
+
+
 async def process_resume_score(
-    resume_content: bytes,
-    resume_type: str
+    resume_text: str,
+    scorer: ResumeScorer,
+    scoring_mode: Optional[Literal["single", "multi"]] = None
 ) -> Dict:
-    """Process resume and generate score"""
+    """Score extracted resume text"""
     try:
-        scorer = ResumeScorer()
-        
-        # Extract text from resume
-        if resume_type == "pdf":
-            resume_text = await scorer.resume_processor.extract_text_from_pdf(resume_content)
-        else:
-            resume_text = await scorer.resume_processor.extract_text_from_image(resume_content)
-        
-        # Detect domain
-        domain = await scorer.detect_domain(resume_text)
-        
-        # Calculate scores and get advice
-        total_score, component_scores, advice = await scorer.calculate_score(resume_text, domain)
+        # Detect domain, calculate scores and get advice
+        result = await scorer.score(resume_text, scoring_mode)
         
         return {
-            "domain": domain,
-            "total_score": total_score,
-            "component_scores": component_scores,
+            "domain": result["domain"],
+            "total_score": result["total_score"],
+            "component_scores": result["component_scores"],
             "resume_text": resume_text,
-            "improvement_advice": advice
+            "improvement_advice": result["improvement_advice"],
+            "scoring_mode": result["scoring_mode"]
         }
         
     except Exception as e:
@@ -0,0 +1,92 @@
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple, Union
+from langchain_community.tools.tavily_search import TavilySearchResults
+from pydantic import Field
+from utils.cache import CacheBackend
+from utils.single_flight import SingleFlight, canonical_key
+
+# Keep the characters that change a technology's meaning: C++, C#, Node.js, .NET
+_QUERY_TOKEN = re.compile(r"[\w+#.]+")
+
+SearchOutput = Tuple[Union[List[Dict], str], Dict]
+
+
+def normalize_query(query: str) -> str:
+    """Case, spacing, punctuation and word order insensitive form of a search query.
+
+    "Python backend, Remote" and "remote  python BACKEND" share one entry.
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    tokens = {token.strip(".") for token in _QUERY_TOKEN.findall(text)}
+    return " ".join(sorted(token for token in tokens if token))
+
+
+class CachedTavilySearchResults(TavilySearchResults):
+    """Tavily search whose results are cached by normalized query.
+
+    Identical queries already in flight share one request. Failed searches, which the
+    tool returns as an error string, are not cached.
+    """
+
+    cache: Optional[CacheBackend] = Field(default=None, exclude=True)
+    single_flight: Optional[SingleFlight] = Field(default=None, exclude=True)
+    cache_ttl: Optional[float] = None
+    external_calls: int = 0
+
+    def cache_key(self, query: str) -> str:
+        # Search options are part of the key, a deeper or wider search is a different result
+        return canonical_key(
+            normalize_query(query),
+            self.max_results,
+            self.search_depth,
+            self.include_domains,
+            self.exclude_domains,
+            self.include_answer,
+            self.include_raw_content,
+            self.include_images
+        )
+
+    def _cached(self, key: str) -> Optional[SearchOutput]:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key)
+        return (cached[0], cached[1]) if cached is not None else None
+
+    def _store(self, key: str, output: SearchOutput) -> None:
+        content, artifact = output
+        if self.cache is not None and isinstance(content, list):
+            # A list rather than a tuple so the disk backend can store it as JSON
+            self.cache.set(key, [content, artifact], ttl=self.cache_ttl)
+
+    def _run(self, query: str, run_manager: Any = None) -> SearchOutput:
+        key = self.cache_key(query)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        self.external_calls += 1
+        output = super()._run(query, run_manager=run_manager)
+        self._store(key, output)
+        return output
+
+    async def _arun(self, query: str, run_manager: Any = None) -> SearchOutput:
+        key = self.cache_key(query)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        async def search() -> SearchOutput:
+            self.external_calls += 1
+            output = await super(CachedTavilySearchResults, self)._arun(query, run_manager=run_manager)
+            self._store(key, output)
+            return output
+
+        if self.single_flight is None:
+            return await search()
+        return await self.single_flight.run("tavily.search", key, search)
+
+    def stats(self) -> Dict:
+        return {
+            "external_calls": self.external_calls,
+            "cache": self.cache.stats() if self.cache is not None else {},
+        }
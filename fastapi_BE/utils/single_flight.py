@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import json
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def canonical_key(*parts: Any) -> str:
+    """SHA-256 over a canonical JSON form of `parts`, so equal dicts hash equally whatever their key order"""
+    source = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce identical in-flight pipelines: duplicate callers await the first caller's result.
+
+    The work runs in its own task, so one caller going away does not fail the others;
+    it is only cancelled once every caller waiting on it has gone. Results are not kept
+    after the flight lands, repeated requests later on are left to the caches.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Tuple[str, str], _Flight] = {}
+        self.endpoint_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"started": 0, "coalesced": 0})
+
+    async def run(self, endpoint: str, key: str, work: Callable[[], Awaitable[T]], borrows: bool = False) -> T:
+        """Await `work()`, or the identical flight already running.
+
+        With `borrows`, the work uses something the caller releases once this returns (a request's
+        upload). The caller that started the flight then does not return, even when cancelled,
+        before the work is done with it.
+        """
+        flight_key = (endpoint, key)
+        flight = self._flights.get(flight_key)
+        started = flight is None
+        if started:
+            flight = _Flight(asyncio.create_task(work()))
+            self._flights[flight_key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(flight_key, flight))
+            self.endpoint_stats[endpoint]["started"] += 1
+        else:
+            self.endpoint_stats[endpoint]["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+            if borrows and started:
+                await self._outlast(flight.task)
+
+    @staticmethod
+    async def _outlast(task: asyncio.Task) -> None:
+        cancelled = False
+        while not task.done():
+            try:
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                # Cancellation can be delivered again while waiting, it is re-raised once the work is done
+                cancelled = True
+        if cancelled:
+            raise asyncio.CancelledError()
+
+    def _forget(self, flight_key: Tuple[str, str], flight: _Flight) -> None:
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+        if not flight.task.cancelled():
+            # Mark the exception as retrieved even when every waiter has left
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        in_flight: Dict[str, int] = defaultdict(int)
+        for endpoint, _ in self._flights:
+            in_flight[endpoint] += 1
+        return {
+            endpoint: {**counts, "in_flight": in_flight[endpoint]}
+            for endpoint, counts in self.endpoint_stats.items()
+        }
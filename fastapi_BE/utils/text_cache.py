@@ -0,0 +1,21 @@
+import hashlib
+from typing import Optional, Union
+from core.config import settings
+from utils.cache import DiskCache, TTLCache, TieredCache
+
+
+def content_digest(content: Union[bytes, memoryview]) -> str:
+    """SHA-256 of the raw uploaded bytes, the key for everything extracted from them"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def build_text_cache() -> TieredCache:
+    """Extracted resume / job description text shared by every upload endpoint"""
+    memory = TTLCache(
+        maxsize=settings.text_cache_max_entries,
+        max_bytes=settings.text_cache_max_bytes
+    )
+    persistent: Optional[DiskCache] = None
+    if settings.text_cache_dir:
+        persistent = DiskCache(settings.text_cache_dir, max_bytes=settings.text_cache_disk_max_bytes)
+    return TieredCache(memory, persistent)
@@ -0,0 +1,177 @@
+import contextvars
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from core.config import settings
+from utils.metrics import counter, histogram
+
+span_seconds = histogram("span_duration_seconds", "Time spent in each traced stage", labels=("span",))
+request_seconds = histogram("http_request_duration_seconds", "Request latency by route", labels=("method", "route", "status"))
+llm_call_seconds = histogram("llm_call_duration_seconds", "Model call latency, streams include their scheduler wait", labels=("model",))
+llm_tokens = counter("llm_tokens", "Tokens reported by the model endpoint", labels=("model", "type"))
+tool_seconds = histogram("agent_tool_duration_seconds", "Agent tool call latency", labels=("tool",))
+agent_steps = histogram("agent_steps", "Tool-using iterations per agent run", buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15))
+
+
+class RequestTrace:
+    """Time per stage for one request, aggregated by stage name for the Server-Timing header"""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def server_timing(self) -> str:
+        entries = []
+        for name, seconds in self.durations.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if self.counts[name] > 1:
+                entry += f';desc="{self.counts[name]}x"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("request_trace", default=None)
+_DISABLED = nullcontext()
+
+
+def record_span(name: str, seconds: float) -> None:
+    if not settings.tracing_enabled:
+        return
+    span_seconds.observe(seconds, name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_span(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def span(name: str):
+    """Time the block as stage `name`; a shared no-op context when tracing is disabled"""
+    if not settings.tracing_enabled:
+        return _DISABLED
+    return _Span(name)
+
+
+def record_llm_call(model: str, seconds: float, usage: Optional[Dict[str, Any]]) -> None:
+    if not settings.tracing_enabled:
+        return
+    llm_call_seconds.observe(seconds, model)
+    record_span("llm", seconds)
+    if usage:
+        # OpenAI style token_usage or LangChain usage_metadata
+        prompt_tokens = usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0
+        completion_tokens = usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0
+        llm_tokens.inc(prompt_tokens, model, "prompt")
+        llm_tokens.inc(completion_tokens, model, "completion")
+
+
+class AgentTracingHandler(BaseCallbackHandler):
+    """Times each tool call of an agent run and counts its iterations"""
+
+    run_inline = True
+
+    def __init__(self):
+        self._tool_starts: Dict[UUID, tuple] = {}
+        self.steps = 0
+
+    def on_agent_action(self, action: Any, **kwargs: Any) -> None:
+        self.steps += 1
+
+    def on_agent_finish(self, finish: Any, **kwargs: Any) -> None:
+        agent_steps.observe(self.steps)
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._tool_starts[run_id] = ((serialized or {}).get("name", "tool"), time.perf_counter())
+
+    def _tool_done(self, run_id: UUID) -> None:
+        started = self._tool_starts.pop(run_id, None)
+        if started is not None:
+            name, started_at = started
+            elapsed = time.perf_counter() - started_at
+            tool_seconds.observe(elapsed, name)
+            record_span("tool", elapsed)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._tool_done(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._tool_done(run_id)
+
+
+def agent_callbacks() -> List[BaseCallbackHandler]:
+    """Callbacks for one agent run, none when tracing is disabled"""
+    return [AgentTracingHandler()] if settings.tracing_enabled else []
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement the engine executes as the "db" stage"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_span("db", time.perf_counter() - conn.info["query_started"].pop())
+
+
+class TracingMiddleware:
+    """Give each request a trace, report it in a Server-Timing header and record route latency"""
+
+    def __init__(self, app, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    trace.add("total", time.perf_counter() - started)
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            # Label by route template, not the raw path, to keep the number of series bounded
+            route = scope.get("route")
+            request_seconds.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status)
+            )
+            _current_trace.reset(token)
@@ -0,0 +1,162 @@
+import hashlib
+import io
+import mmap
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from core.config import settings
+
+CHUNK_SIZE = 64 * 1024
+# Same in-memory threshold Starlette uses for multipart files
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+class IngestedUpload:
+    """Uploaded file left in Starlette's spool, with its size and SHA-256 computed while reading"""
+
+    def __init__(self, file: UploadFile, size: int, digest: str):
+        self.file = file
+        self.size = size
+        self.digest = digest
+        self.content_type = file.content_type
+        self._views: List[memoryview] = []
+        self._mmap: Optional[mmap.mmap] = None
+        # Detached uploads own their spool, request uploads are closed by Starlette
+        self.owns_file = False
+
+    def getbuffer(self) -> memoryview:
+        """Zero-copy view of the content, whether the spool is still in memory or rolled over to disk"""
+        spool = self.file.file
+        buffer = getattr(spool, "_file", spool)
+        if isinstance(buffer, io.BytesIO):
+            view = buffer.getbuffer()
+        else:
+            if self._mmap is None:
+                buffer.flush()
+                self._mmap = mmap.mmap(buffer.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+            view = memoryview(self._mmap) if self._mmap is not None else memoryview(b"")
+        self._views.append(view)
+        return view
+
+    def close(self):
+        # Views must be released before Starlette can close the spool
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self.owns_file:
+            self.file.file.close()
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {max_bytes // (1024 * 1024)} MB"
+    )
+
+
+@asynccontextmanager
+async def ingest_upload(file: UploadFile, max_bytes: Optional[int] = None) -> AsyncIterator[IngestedUpload]:
+    """Hash and size-check an upload chunk by chunk, without reading it into memory.
+
+    Starlette has spooled the file by now; RequestSizeLimitMiddleware is what stops an oversized
+    body while it is still arriving, this enforces the tighter per-file limit.
+    """
+    max_bytes = max_bytes or settings.max_upload_bytes
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    digest = hashlib.sha256()
+    size = 0
+    await file.seek(0)
+    while chunk := await file.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(max_bytes)
+        digest.update(chunk)
+    await file.seek(0)
+
+    upload = IngestedUpload(file, size, digest.hexdigest())
+    try:
+        yield upload
+    finally:
+        upload.close()
+
+
+async def detach_upload(upload: IngestedUpload) -> IngestedUpload:
+    """Copy an upload into a spool owned by the caller, for streaming responses that outlive the form.
+
+    FastAPI closes uploaded files as soon as the endpoint returns, before a streamed body is sent.
+    The copy is spooled too, so large files still go to disk rather than memory.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    await upload.file.seek(0)
+    while chunk := await upload.file.read(CHUNK_SIZE):
+        spool.write(chunk)
+    spool.seek(0)
+
+    detached = IngestedUpload(
+        UploadFile(spool, size=upload.size, filename=upload.file.filename, headers=upload.file.headers),
+        upload.size,
+        upload.digest
+    )
+    detached.owns_file = True
+    return detached
+
+
+class RequestSizeLimitMiddleware:
+    """Reject request bodies over `max_bytes` while they stream in, before the multipart body is parsed.
+
+    A declared Content-Length over the limit is refused before anything is read. Otherwise (chunked
+    uploads, or a Content-Length that understates the body) bytes are counted as receive() delivers
+    them, and the request is aborted with 413 as soon as the count passes the limit.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse(content={"detail": "Request body too large"}, status_code=413)
+        await response(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so this becomes the 413 response
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except HTTPException as e:
+            # Raised where nothing turned it into a response, e.g. a route reading request.stream() itself
+            if e.status_code != 413 or response_started:
+                raise
+            await self._reject(scope, receive, send)